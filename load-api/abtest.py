@@ -0,0 +1,98 @@
+"""
+A/B-сравнение нескольких целевых БД: один набор скриптов, вперемешку и с одинаковым параллелизмом.
+
+Цели (targets) задаются по имени: default — DB_DSN, остальные — DB_TARGETS (JSON-объект
+имя -> DSN) или через /api/targets. Запуски идут раундами: в каждом раунде каждый скрипт
+выполняется по разу на каждой цели, порядок скриптов и целей внутри раунда случайный.
+Так дрейф нагрузки и прогрев кэшей распределяются по целям поровну, а замеры одного
+раунда можно сравнивать попарно.
+"""
+import re
+import json
+import math
+import random
+from array import array
+from typing import Iterator
+
+TARGET_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+DEFAULT_TARGET = "default"
+
+# Двусторонний 95% квантиль нормального распределения (доверительные интервалы ускорения)
+_Z95 = 1.959964
+
+
+def parse_targets(value: str) -> dict[str, str]:
+    """
+    DB_TARGETS: {"replica": "postgresql://...", "new_index": "postgresql://..."}. Ошибки — ValueError.
+    """
+    if not value.strip():
+        return {}
+    data = json.loads(value)
+    if not isinstance(data, dict):
+        raise ValueError("DB_TARGETS must be a JSON object: name -> DSN")
+    for name, dsn in data.items():
+        check_target(name, dsn)
+    if DEFAULT_TARGET in data:
+        raise ValueError(f"'{DEFAULT_TARGET}' is DB_DSN and cannot be redefined")
+    return dict(data)
+
+
+def check_target(name: str, dsn) -> None:
+    if not TARGET_NAME_RE.match(name):
+        raise ValueError(f"Invalid target name: {name!r}")
+    if not isinstance(dsn, str) or not dsn.strip():
+        raise ValueError(f"Target '{name}': DSN must be a non-empty string")
+
+
+def interleaved_jobs(scripts: list[int], targets: list[str], rounds: int, rng: random.Random) -> Iterator[tuple[int, int, str]]:
+    """
+    Запуски (раунд, скрипт, цель) лениво, по раундам: внутри раунда скрипты перемешаны,
+    цели каждого скрипта — тоже.
+    """
+    for r in range(rounds):
+        order = scripts[:]
+        rng.shuffle(order)
+        for n in order:
+            names = targets[:]
+            rng.shuffle(names)
+            for name in names:
+                yield r, n, name
+
+
+def new_samples(rounds: int) -> array:
+    """
+    Замеры скрипта на цели по раундам, мс; NaN — запуск с ошибкой (раунд выпадает из пар).
+    """
+    return array("d", [math.nan]) * rounds
+
+
+def paired_speedup(baseline: array, other: array) -> dict:
+    """
+    Ускорение other относительно baseline по парам одного раунда: геометрическое среднее
+    baseline/other (> 1 — other быстрее) и 95% доверительный интервал (нормальное приближение
+    для среднего логарифма отношения). Раунды, где хоть один запуск упал, не учитываются.
+    """
+    logs = [
+        math.log(b / o)
+        for b, o in zip(baseline, other)
+        if not (math.isnan(b) or math.isnan(o)) and b > 0 and o > 0
+    ]
+    n = len(logs)
+    if n < 2:
+        return {"speedup": None, "ci95": None, "pairs": n, "verdict": "insufficient data"}
+    mean = sum(logs) / n
+    sd = math.sqrt(sum((x - mean) ** 2 for x in logs) / (n - 1))
+    half = _Z95 * sd / math.sqrt(n)
+    low, high = math.exp(mean - half), math.exp(mean + half)
+    if low > 1:
+        verdict = "faster"
+    elif high < 1:
+        verdict = "slower"
+    else:
+        verdict = "no significant difference"
+    return {
+        "speedup": round(math.exp(mean), 4),
+        "ci95": [round(low, 4), round(high, 4)],
+        "pairs": n,
+        "verdict": verdict,
+    }
@@ -0,0 +1,280 @@
+"""
+Бенчмарк накладных расходов самого load-api на одноразовом локальном PostgreSQL.
+
+    python bench/run.py                                    # временный кластер: initdb/pg_ctl из PATH или PG_BIN
+    python bench/run.py --dsn postgresql://postgres@/postgres?host=/tmp
+    python bench/run.py --save bench-baseline.json         # снять базовую линию
+    python bench/run.py --compare bench-baseline.json      # сравнить, код 1 при регрессии
+
+Сервис поднимается отдельным процессом uvicorn на свободном порту со скриптами из bench/sql
+(копия во временном каталоге) и историей во временном файле. Набор случаев — пробы /calibrate
+(пол замера по движкам и протоколам) и /requests на тривиальных скриптах (разбор результата,
+параметры, пооператорный замер, транзакции). Серверная работа в них ничтожна, поэтому
+пропускная способность меряет в основном код раннера. Каждый случай повторяется --repeat раз,
+в отчёт идёт медиана; при --compare пропускная способность ниже базовой больше чем на
+--tolerance-pct считается регрессией. Базовая линия имеет смысл только на той же машине;
+на общей или малоядерной машине разброс между запусками бывает десятки процентов —
+там нужны больше --repeat и --count или шире допуск.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import datetime
+import tempfile
+import statistics
+import subprocess
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent
+
+# Случаи: имя -> (путь, параметры). Для /calibrate метрики по уровням, для /requests — одна
+CASES = {
+    "calibrate.thread.simple.select1": ("/calibrate", {"engine": "thread", "exec_mode": "simple", "probe": "select1"}),
+    "calibrate.thread.simple.empty": ("/calibrate", {"engine": "thread", "exec_mode": "simple", "probe": "empty"}),
+    "calibrate.thread.prepared.select1": ("/calibrate", {"engine": "thread", "exec_mode": "prepared", "probe": "select1"}),
+    "calibrate.thread.pipeline.select1": ("/calibrate", {"engine": "thread", "exec_mode": "pipeline", "probe": "select1"}),
+    "calibrate.thread.simple.select1.tx": (
+        "/calibrate", {"engine": "thread", "exec_mode": "simple", "probe": "select1", "transactional": "true"}
+    ),
+    "calibrate.async.simple.select1": ("/calibrate", {"engine": "async", "exec_mode": "simple", "probe": "select1"}),
+    "calibrate.async.prepared.select1": ("/calibrate", {"engine": "async", "exec_mode": "prepared", "probe": "select1"}),
+    "requests.thread.simple": ("/requests", {"engine": "thread", "exec_mode": "simple"}),
+    "requests.thread.fetch_all": ("/requests", {"engine": "thread", "exec_mode": "simple", "fetch": "all"}),
+    "requests.thread.per_statement": ("/requests", {"engine": "thread", "exec_mode": "prepared", "per_statement": "true"}),
+    "requests.thread.pipeline": ("/requests", {"engine": "thread", "exec_mode": "pipeline"}),
+    "requests.async.simple": ("/requests", {"engine": "async", "exec_mode": "simple"}),
+    "requests.async.fetch_all": ("/requests", {"engine": "async", "exec_mode": "simple", "fetch": "all"}),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _pg_tool(name: str) -> str:
+    pg_bin = os.getenv("PG_BIN")
+    path = str(Path(pg_bin) / name) if pg_bin else shutil.which(name)
+    if not path or not Path(path).exists():
+        sys.exit(f"{name} not found: add PostgreSQL binaries to PATH, set PG_BIN or pass --dsn")
+    return path
+
+
+class TempPostgres:
+    """
+    Кластер во временном каталоге, только unix-сокет, без fsync — данные бенчмарку не нужны.
+    """
+
+    def __init__(self, workdir: Path):
+        self.data = workdir / "pgdata"
+        self.socket_dir = workdir
+
+    def start(self) -> str:
+        options = f"-k {self.socket_dir} -c listen_addresses='' -c fsync=off -c synchronous_commit=off -c max_connections=300"
+        try:
+            subprocess.run(
+                [_pg_tool("initdb"), "-D", str(self.data), "-U", "postgres", "-A", "trust", "--no-sync"],
+                check=True, stdout=subprocess.DEVNULL,
+            )
+            subprocess.run(
+                [_pg_tool("pg_ctl"), "-D", str(self.data), "-o", options, "-l", str(self.data / "server.log"), "-w", "start"],
+                check=True, stdout=subprocess.DEVNULL,
+            )
+        except subprocess.CalledProcessError as e:
+            # initdb не запускается от root — тогда нужен --dsn или непривилегированный пользователь
+            sys.exit(f"Throwaway PostgreSQL failed to start ({Path(e.cmd[0]).name} exited with {e.returncode}); use --dsn")
+        return f"postgresql://postgres@/postgres?host={self.socket_dir}"
+
+    def stop(self) -> None:
+        subprocess.run(
+            [_pg_tool("pg_ctl"), "-D", str(self.data), "-m", "immediate", "-w", "stop"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+
+class Service:
+    """
+    load-api отдельным процессом uvicorn: так в замер попадает тот же event loop и пулы, что в проде.
+    """
+
+    def __init__(self, dsn: str, workdir: Path, max_workers: int):
+        self.port = _free_port()
+        scripts = workdir / "sql"
+        shutil.copytree(BENCH_DIR / "sql", scripts)
+        env = dict(os.environ)
+        env.update({
+            "DB_DSN": dsn,
+            "DB_TARGETS": "",
+            "SCRIPTS_DIR": str(scripts),
+            "HISTORY_DB": str(workdir / "history.sqlite3"),
+            "MAX_WORKERS": str(max_workers),
+        })
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning"],
+            cwd=APP_DIR, env=env,
+        )
+
+    def get(self, path: str, params: dict, timeout: float = 600) -> dict:
+        url = f"http://127.0.0.1:{self.port}{path}?{urllib.parse.urlencode(params)}"
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resp:
+                return json.load(resp)
+        except urllib.error.HTTPError as e:
+            sys.exit(f"{path} failed: {e.code} {e.read().decode('utf-8', 'replace')}")
+
+    def wait_ready(self, timeout_s: float = 30) -> None:
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                sys.exit("load-api exited during startup")
+            try:
+                self.get("/health", {}, timeout=1)
+                return
+            except OSError:
+                time.sleep(0.2)
+        sys.exit("load-api did not start in time")
+
+    def stop(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+def _run_case(service: Service, path: str, params: dict, args) -> dict[str, dict]:
+    """
+    Один прогон случая: метрика -> {throughput_rps, floor_ms}.
+    """
+    if path == "/calibrate":
+        res = service.get(path, {**params, "levels": args.levels, "runs": args.runs})
+        if res["status"] != "ok":
+            sys.exit(f"{path} {params}: {res['status']}")
+        return {
+            f"c{p['concurrency']}": {"throughput_rps": p["throughput_rps"], "floor_ms": p["latency"]["median_ms"]}
+            for p in res["curve"]
+        }
+    res = service.get(
+        f"{path}/{args.count}", {**params, "max_workers": args.max_workers, "save_history": "false"}
+    )
+    if res["status"] != "ok":
+        sys.exit(f"{path} {params}: {res['status']}")
+    summary = res["summary"]
+    return {
+        f"c{args.max_workers}": {
+            "throughput_rps": round(summary["completed"] / summary["wall_time_ms"] * 1000, 3),
+            "floor_ms": None,
+        }
+    }
+
+
+def run_suite(service: Service, args) -> dict:
+    cases = {}
+    for name, (path, params) in CASES.items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        # первый прогон не в зачёт: рост пула, генерация параметров, prepared statements на коннектах
+        for _ in range(args.warmup):
+            _run_case(service, path, params, args)
+        repeats = [_run_case(service, path, params, args) for _ in range(args.repeat)]
+        metrics = {}
+        for metric in repeats[0]:
+            throughput = [r[metric]["throughput_rps"] for r in repeats]
+            floors = [r[metric]["floor_ms"] for r in repeats if r[metric]["floor_ms"] is not None]
+            metrics[metric] = {
+                "throughput_rps": round(statistics.median(throughput), 3),
+                "floor_ms": round(statistics.median(floors), 3) if floors else None,
+                "runs": throughput,
+            }
+        cases[name] = metrics
+        print(name, " ".join(f"{m}={v['throughput_rps']:.0f}/s" for m, v in metrics.items()), flush=True)
+    return cases
+
+
+def compare(baseline: dict, cases: dict, tolerance_pct: float) -> list[dict]:
+    """
+    Сравнить с базовой линией: изменение пропускной способности по каждой общей метрике.
+    """
+    rows = []
+    for name, metrics in cases.items():
+        for metric, value in metrics.items():
+            base = baseline.get("cases", {}).get(name, {}).get(metric)
+            if base is None or not base["throughput_rps"]:
+                continue
+            change = (value["throughput_rps"] - base["throughput_rps"]) / base["throughput_rps"] * 100
+            rows.append({
+                "case": name,
+                "metric": metric,
+                "baseline_rps": base["throughput_rps"],
+                "current_rps": value["throughput_rps"],
+                "change_pct": round(change, 2),
+                "regression": change < -tolerance_pct,
+            })
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Harness overhead benchmark for load-api")
+    parser.add_argument("--dsn", help="existing database instead of a throwaway cluster")
+    parser.add_argument("--levels", default="1,8,32", help="concurrency levels for /calibrate cases")
+    parser.add_argument("--runs", type=int, default=3000, help="probe runs per level")
+    parser.add_argument("--count", type=int, default=1000, help="runs per script for /requests cases")
+    parser.add_argument("--max-workers", type=int, default=8, help="window for /requests cases")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per case (median is reported)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed repetitions per case before measuring")
+    parser.add_argument("--only", action="append", help="run cases whose name contains this (repeatable)")
+    parser.add_argument("--save", type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare with")
+    parser.add_argument("--tolerance-pct", type=float, default=10.0, help="allowed throughput drop, percent")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="load-api-bench-") as tmp:
+        workdir = Path(tmp)
+        postgres = None if args.dsn else TempPostgres(workdir)
+        dsn = args.dsn or postgres.start()
+        service = None
+        try:
+            service = Service(dsn, workdir, max(args.max_workers, *map(int, args.levels.split(","))))
+            service.wait_ready()
+            cases = run_suite(service, args)
+        finally:
+            if service is not None:
+                service.stop()
+            if postgres is not None:
+                postgres.stop()
+
+    result = {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "params": {
+            "levels": args.levels, "runs": args.runs, "count": args.count,
+            "max_workers": args.max_workers, "repeat": args.repeat, "warmup": args.warmup,
+        },
+        "cases": cases,
+    }
+    if args.save:
+        args.save.write_text(json.dumps(result, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        rows = compare(baseline, cases, args.tolerance_pct)
+        for row in rows:
+            mark = "REGRESSION" if row["regression"] else "ok"
+            print(f"{row['case']} {row['metric']}: {row['baseline_rps']:.0f} -> {row['current_rps']:.0f}/s "
+                  f"({row['change_pct']:+.1f}%) {mark}")
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
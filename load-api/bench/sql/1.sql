@@ -0,0 +1 @@
+SELECT g, md5(g::text) FROM generate_series(1, 100) g;
@@ -0,0 +1,2 @@
+-- @param id range 1 1000000
+SELECT %(id)s::int + 1;
@@ -0,0 +1,116 @@
+"""
+Калибровка накладных расходов самого load-api: тривиальный оператор (SELECT 1 или пустой запрос)
+гоняется тем же путём, что и скрипты, — пул потоков или event loop, выдача коннекта из пула,
+переключение autocommit, сборка результата. Время такого запуска — «пол» замера: меньше
+на этом уровне параллелизма не покажет ни один скрипт.
+
+Пробы выполняются как псевдоскрипты с номерами <= 0 (каталог нумерует скрипты с 1), поэтому
+замер идёт по тому же коду, что и обычный запуск. Последняя калибровка для сочетания
+(проба, движок, протокол, транзакционность, цель) хранится в памяти процесса; по ней
+/requests может вычесть пол из своих задержек.
+"""
+import math
+import datetime
+from pathlib import Path
+
+from catalog import ScriptEntry
+
+# Проба -> (номер псевдоскрипта, текст). Пустой запрос — только обмен с сервером, без разбора и плана
+PROBES = {
+    "select1": (0, "SELECT 1"),
+    "empty": (-1, ""),
+}
+
+_STAT_KEYS = ("min_ms", "median_ms", "avg_ms", "p90_ms", "p95_ms", "p99_ms", "p999_ms", "max_ms")
+
+
+def probe_entries() -> dict[int, ScriptEntry]:
+    """
+    Записи псевдоскриптов проб. Операторы заданы явно: разбиение пустого текста не дало бы
+    ни одного оператора, и prepared/pipeline не ходили бы на сервер.
+    """
+    entries = {}
+    for name, (n, text) in PROBES.items():
+        entry = ScriptEntry(n, Path(f"<probe:{name}>"), len(text), 0, text)
+        entry.cached("statements", lambda _sql, text=text: [(text, None)])
+        entry.cached("template", lambda _sql: None)
+        entries[n] = entry
+    return entries
+
+
+_PROBE_LABELS = {n: f"probe:{name}" for name, (n, _text) in PROBES.items()}
+
+
+def script_label(n: int) -> str:
+    """
+    Имя скрипта в отчётах и метриках: n.sql или probe:<проба>.
+    """
+    return _PROBE_LABELS.get(n) or f"{n}.sql"
+
+
+class Calibrations:
+    """
+    Последние калибровки: ключ сочетания -> {уровень параллелизма: отчёт уровня}.
+    """
+
+    def __init__(self):
+        self._levels: dict[tuple, dict[int, dict]] = {}
+
+    @staticmethod
+    def key(probe: str, engine: str, exec_mode: str, transactional: bool, target: str) -> tuple:
+        return probe, engine, exec_mode, transactional, target
+
+    def store(self, key: tuple, curve: list[dict]) -> None:
+        """
+        Запомнить кривую калибровки (уровни без успешных запусков пропускаются); точки получают calibrated_at.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        for point in curve:
+            point["calibrated_at"] = now
+        self._levels[key] = {point["concurrency"]: point for point in curve if point["completed"]}
+
+    def floor(self, key: tuple, concurrency: int) -> dict | None:
+        """
+        Пол для уровня concurrency: ближайший откалиброванный уровень (по отношению, а не по разности —
+        уровни обычно идут степенями двойки). None — калибровки для сочетания не было.
+        """
+        levels = self._levels.get(key)
+        if not levels:
+            return None
+        level = min(levels, key=lambda c: (abs(math.log(c / concurrency)), c))
+        point = levels[level]
+        return {
+            "probe": key[0],
+            "calibrated_concurrency": level,
+            "requested_concurrency": concurrency,
+            "floor_ms": point["latency"]["median_ms"],
+            "calibrated_at": point["calibrated_at"],
+        }
+
+    def forget_target(self, target: str) -> None:
+        """
+        Сбросить калибровки цели (DSN цели сменился или она удалена).
+        """
+        for key in [k for k in self._levels if k[4] == target]:
+            del self._levels[key]
+
+    def describe(self) -> list[dict]:
+        return [
+            {
+                "probe": probe, "engine": engine, "exec_mode": exec_mode,
+                "transactional": transactional, "target": target,
+                "levels": {
+                    c: {"floor_ms": p["latency"]["median_ms"], "calibrated_at": p["calibrated_at"]}
+                    for c, p in sorted(levels.items())
+                },
+            }
+            for (probe, engine, exec_mode, transactional, target), levels in self._levels.items()
+        ]
+
+
+def net_stats(stats: dict, floor_ms: float) -> dict:
+    """
+    Сводка задержек за вычетом пола: каждая статистика минус floor_ms, не ниже нуля.
+    Это сдвиг, а не вычитание распределений: разброс самого пола в результате остаётся.
+    """
+    return {k: round(max(0.0, stats[k] - floor_ms), 3) for k in _STAT_KEYS if k in stats}
@@ -0,0 +1,242 @@
+"""
+Каталог скриптов в памяти: номер -> размер, mtime, хэш и содержимое.
+
+Каталог читается с диска один раз (с выравниванием нумерации до 1..n), дальше меняется
+точечно: правка, загрузка и удаление через API обновляют только затронутые номера.
+Изменения, сделанные мимо API (том в docker, git pull), подхватывает sync() — он сверяет
+имена, размеры и mtime и перечитывает только изменившиеся файлы.
+
+Производные данные скрипта (разбор, наборы параметров) хранятся прямо в записи
+(ScriptEntry.cached) и уходят вместе с ней, когда файл меняется.
+"""
+import os
+import re
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Iterable
+
+NUMERIC_SQL_RE = re.compile(r"^(\d+)\.sql$", re.IGNORECASE)
+
+
+class ScriptEntry:
+    __slots__ = ("n", "path", "size", "mtime_ns", "hash", "content", "_cache")
+
+    def __init__(self, n: int, path: Path, size: int, mtime_ns: int, content: str):
+        self.n = n
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.content = content
+        self.hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        self._cache: dict = {}
+
+    def cached(self, key: str, build: Callable[[str], object]):
+        """
+        Производное от содержимого (разбор, разбиение на операторы) — считается один раз
+        и живёт, пока жива запись: новая версия файла — новая запись.
+        """
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = build(self.content)
+            return value
+
+    def moved(self, n: int, path: Path) -> "ScriptEntry":
+        """
+        Та же версия файла под новым номером (после переименования): содержимое и кэш общие.
+        """
+        entry = ScriptEntry.__new__(ScriptEntry)
+        entry.n, entry.path, entry.size, entry.mtime_ns = n, path, self.size, self.mtime_ns
+        entry.content, entry.hash, entry._cache = self.content, self.hash, self._cache
+        return entry
+
+    def describe(self) -> dict:
+        return {
+            "n": self.n,
+            "filename": self.path.name,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "hash": self.hash,
+        }
+
+
+def _read_entry(n: int, path: Path) -> ScriptEntry:
+    st = path.stat()
+    # файл, положенный мимо API, может быть не в UTF-8 — не ронять из-за него весь каталог
+    return ScriptEntry(n, path, st.st_size, st.st_mtime_ns, path.read_text(encoding="utf-8", errors="replace"))
+
+
+class ScriptCatalog:
+    """
+    Скрипты 1.sql .. n.sql каталога directory. Чтение без блокировок: изменения под блокировкой
+    либо меняют одну запись, либо собирают новый словарь и подменяют его целиком.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._entries: dict[int, ScriptEntry] = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    # -----------------------------
+    # Загрузка и сверка с диском
+    # -----------------------------
+    def _scan(self) -> dict[int, os.DirEntry]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        found = {}
+        with os.scandir(self.directory) as it:
+            for de in it:
+                m = NUMERIC_SQL_RE.match(de.name)
+                if m and de.is_file():
+                    found[int(m.group(1))] = de
+        return found
+
+    def _renumber(self, found: dict[int, os.DirEntry]) -> dict[int, Path]:
+        """
+        Выровнять нумерацию до 1..n без дырок, сохранив порядок. Две фазы через временные имена,
+        чтобы переименования не конфликтовали.
+        """
+        ordered = [Path(found[k].path) for k in sorted(found)]
+        if all(p.name == f"{i}.sql" for i, p in enumerate(ordered, start=1)):
+            return dict(enumerate(ordered, start=1))
+        temp = []
+        for i, p in enumerate(ordered, start=1):
+            tmp = p.with_name(f".__tmp_{i}__.sql")
+            p.rename(tmp)
+            temp.append(tmp)
+        result = {}
+        for i, tmp in enumerate(temp, start=1):
+            dest = self.directory / f"{i}.sql"
+            tmp.rename(dest)
+            result[i] = dest
+        return result
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    paths = self._renumber(self._scan())
+                    self._entries = {n: _read_entry(n, p) for n, p in paths.items()}
+                    self._loaded = True
+
+    def sync(self) -> list[int] | None:
+        """
+        Сверить с диском и подхватить внешние изменения. Вернуть изменившиеся номера
+        ([] — ничего, None — была перенумерация и изменилось всё).
+        """
+        with self._lock:
+            if not self._loaded:
+                self._ensure_loaded()
+                return None
+            found = self._scan()
+            if sorted(found) != list(range(1, len(found) + 1)):
+                paths = self._renumber(found)
+                self._entries = {n: _read_entry(n, p) for n, p in paths.items()}
+                return None
+            entries = dict(self._entries)
+            changed = []
+            for n, de in found.items():
+                entry = entries.get(n)
+                st = de.stat()
+                if entry is None or entry.size != st.st_size or entry.mtime_ns != st.st_mtime_ns:
+                    entries[n] = _read_entry(n, Path(de.path))
+                    changed.append(n)
+            for n in [n for n in entries if n not in found]:
+                del entries[n]
+                changed.append(n)
+            if changed:
+                self._entries = entries
+            return sorted(changed)
+
+    # -----------------------------
+    # Чтение
+    # -----------------------------
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._entries)
+
+    def __contains__(self, n: int) -> bool:
+        self._ensure_loaded()
+        return n in self._entries
+
+    def get(self, n: int) -> ScriptEntry | None:
+        self._ensure_loaded()
+        return self._entries.get(n)
+
+    def numbers(self) -> list[int]:
+        # нумерация непрерывна — список номеров не требует обхода записей
+        return list(range(1, len(self) + 1))
+
+    def entries(self) -> list[ScriptEntry]:
+        self._ensure_loaded()
+        entries = self._entries
+        return [entries[n] for n in range(1, len(entries) + 1)]
+
+    # -----------------------------
+    # Изменение
+    # -----------------------------
+    def write(self, n: int, content: str) -> ScriptEntry:
+        """
+        Перезаписать n.sql (KeyError, если такого нет).
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if n not in self._entries:
+                raise KeyError(n)
+            path = self.directory / f"{n}.sql"
+            path.write_text(content, encoding="utf-8")
+            entry = self._entries[n] = _read_entry(n, path)
+        return entry
+
+    def add(self, data: bytes) -> ScriptEntry:
+        """
+        Сохранить как следующий номер (n+1).sql. Не UTF-8 — ValueError, файл не пишется.
+        """
+        return self.add_many([("", data)])[0]
+
+    def add_many(self, items: Iterable[tuple[str, bytes]]) -> list[ScriptEntry]:
+        """
+        Сохранить пачку скриптов под номерами n+1, n+2, ... за один проход: (имя, содержимое) читаются
+        по одному, номера выдаются под блокировкой подряд. Ошибка на любом элементе откатывает
+        всю пачку (записанные файлы удаляются) — ValueError с именем элемента.
+        """
+        added: list[ScriptEntry] = []
+        with self._lock:
+            self._ensure_loaded()
+            entries = dict(self._entries)
+            try:
+                for name, data in items:
+                    try:
+                        data.decode("utf-8")  # UnicodeDecodeError до записи на диск
+                    except UnicodeDecodeError:
+                        raise ValueError(f"{name or 'file'}: not a UTF-8 text file")
+                    n = len(entries) + 1
+                    path = self.directory / f"{n}.sql"
+                    path.write_bytes(data)
+                    entries[n] = _read_entry(n, path)
+                    added.append(entries[n])
+            except BaseException:
+                for entry in added:
+                    entry.path.unlink(missing_ok=True)
+                raise
+            self._entries = entries
+        return added
+
+    def delete(self, n: int) -> None:
+        """
+        Удалить n.sql; следующие за ним сдвигаются на номер вниз, чтобы нумерация осталась 1..n.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if n not in self._entries:
+                raise KeyError(n)
+            entries = dict(self._entries)
+            last = len(entries)
+            entries[n].path.unlink()
+            for k in range(n + 1, last + 1):
+                dest = self.directory / f"{k - 1}.sql"
+                entries[k].path.rename(dest)
+                entries[k - 1] = entries[k].moved(k - 1, dest)
+            del entries[last]
+            self._entries = entries
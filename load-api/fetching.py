@@ -0,0 +1,65 @@
+"""
+Учёт полученных результатов: строки, байты, время до первой строки.
+
+Время до первой строки (ttfr) меряется только для stream: при fetchall (all/binary) execute()
+возвращается, когда libpq уже принял результат целиком, и «первая строка» была бы последней.
+
+Байты — сумма длин значений в результатах (полезная нагрузка DataRow без служебных
+полей протокола). Подсчёт идёт по ячейкам, поэтому его собственное время копится
+в overhead_ns и вычитается из замера.
+"""
+import time
+
+# Режимы получения результата:
+#   none   — результат не извлекается (libpq всё равно принимает его целиком, но без декодирования);
+#   all    — fetchall по каждому результату;
+#   stream — серверный курсор (DECLARE/FETCH) порциями по fetch_size строк;
+#   binary — fetchall в бинарном формате передачи
+FETCH_MODES = ("none", "all", "stream", "binary")
+
+
+def result_bytes(pgresult) -> int:
+    # у PGresult в psycopg нет get_length, только get_value (NULL -> None)
+    get_value = pgresult.get_value
+    nfields = range(pgresult.nfields)
+    total = 0
+    for row in range(pgresult.ntuples):
+        for col in nfields:
+            value = get_value(row, col)
+            if value is not None:
+                total += len(value)
+    return total
+
+
+class TransferStats:
+    """
+    Накопитель по одному запуску скрипта.
+    """
+
+    __slots__ = ("rows", "bytes", "first_row_ns", "overhead_ns")
+
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+        self.first_row_ns = 0
+        self.overhead_ns = 0
+
+    def add(self, pgresult, rows: int, arrived_ns: int | None) -> None:
+        """
+        Учесть порцию из rows строк, пришедшую в arrived_ns (None — момент прихода неизвестен).
+        """
+        if not rows:
+            return
+        if not self.first_row_ns and arrived_ns is not None:
+            self.first_row_ns = arrived_ns
+        t0 = time.perf_counter_ns()
+        self.rows += rows
+        self.bytes += result_bytes(pgresult)
+        self.overhead_ns += time.perf_counter_ns() - t0
+
+    def to_dict(self, exec_ns: int) -> dict:
+        return {
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "ttfr_ms": round((self.first_row_ns - exec_ns) / 1e6, 3) if self.first_row_ns else None,
+        }
@@ -0,0 +1,282 @@
+"""
+Гистограмма задержек в стиле HdrHistogram: заданная точность, слияние между воркерами и запусками.
+
+Значения хранятся в целых микросекундах. Точность задаётся числом значащих цифр
+(1..4): при 3 цифрах относительная ошибка любого перцентиля не больше 0.1%.
+Счётчики разреженные — хранятся только непустые ячейки, поэтому память и время чтения
+зависят от разброса замеров, а не от точности и верхней границы.
+"""
+import math
+import zlib
+import itertools
+import base64
+import struct
+from array import array
+from typing import Iterable
+
+# Верхняя граница по умолчанию — 1 час в микросекундах; всё, что выше, прижимается к ней
+DEFAULT_HIGHEST_US = 3_600_000_000
+DEFAULT_SIGNIFICANT_DIGITS = 3
+MAX_SIGNIFICANT_DIGITS = 4
+
+# Перцентили, которые отдаются в отчёте
+REPORT_PERCENTILES = (50.0, 90.0, 95.0, 99.0, 99.9)
+
+_HEADER = struct.Struct("<BQQQQd")  # digits, highest, total, min, max, sum
+# Флаг в байте digits: за заголовком пары (приращение номера ячейки, счётчик), а не плотный массив
+_SPARSE_FLAG = 0x80
+
+
+class LatencyHistogram:
+    """
+    Лог-линейная гистограмма: диапазон значений разбит на бакеты-степени двойки,
+    каждый бакет — на sub_bucket_count линейных ячеек. Запись — O(1), перцентили — один
+    проход по непустым ячейкам (словарь номер ячейки -> счётчик).
+    """
+
+    __slots__ = (
+        "significant_digits", "highest_us", "total", "min_us", "max_us", "sum_us",
+        "_sub_bucket_half_count_magnitude", "_sub_bucket_half_count", "_sub_bucket_count",
+        "_sub_bucket_mask", "_counts",
+    )
+
+    def __init__(self, significant_digits: int = DEFAULT_SIGNIFICANT_DIGITS, highest_us: int = DEFAULT_HIGHEST_US):
+        if not 1 <= significant_digits <= MAX_SIGNIFICANT_DIGITS:
+            raise ValueError(f"significant_digits must be in 1..{MAX_SIGNIFICANT_DIGITS}")
+        if highest_us < 2:
+            raise ValueError("highest_us must be >= 2")
+        self._setup(significant_digits, highest_us)
+
+    @classmethod
+    def _layout(cls, significant_digits: int, highest_us: int) -> "LatencyHistogram":
+        """
+        Пустая гистограмма без проверки точности — для разобранных из прежнего формата.
+        """
+        hist = cls.__new__(cls)
+        hist._setup(significant_digits, highest_us)
+        return hist
+
+    def _setup(self, significant_digits: int, highest_us: int) -> None:
+        self.significant_digits = significant_digits
+        self.highest_us = highest_us
+        self.total = 0
+        self.min_us = 0
+        self.max_us = 0
+        self.sum_us = 0.0
+
+        largest_single_unit = 2 * 10 ** significant_digits
+        sub_bucket_count_magnitude = math.ceil(math.log2(largest_single_unit))
+        self._sub_bucket_half_count_magnitude = max(sub_bucket_count_magnitude, 1) - 1
+        self._sub_bucket_count = 1 << (self._sub_bucket_half_count_magnitude + 1)
+        self._sub_bucket_half_count = self._sub_bucket_count // 2
+        self._sub_bucket_mask = self._sub_bucket_count - 1
+
+        self._counts: dict[int, int] = {}
+
+    def _dense_size(self) -> int:
+        """
+        Число ячеек плотного массива прежнего формата сериализации.
+        """
+        smallest_untrackable = self._sub_bucket_count
+        bucket_count = 1
+        while smallest_untrackable <= self.highest_us:
+            smallest_untrackable <<= 1
+            bucket_count += 1
+        return (bucket_count + 1) * self._sub_bucket_half_count
+
+    # -----------------------------
+    # Индексация
+    # -----------------------------
+    def _index_of(self, value: int) -> int:
+        bucket = (value | self._sub_bucket_mask).bit_length() - (self._sub_bucket_half_count_magnitude + 1)
+        sub_bucket = value >> bucket
+        return ((bucket + 1) << self._sub_bucket_half_count_magnitude) + (sub_bucket - self._sub_bucket_half_count)
+
+    def _highest_equivalent(self, index: int) -> int:
+        """
+        Наибольшее значение, которое попадает в ту же ячейку, что и index.
+        """
+        bucket = (index >> self._sub_bucket_half_count_magnitude) - 1
+        sub_bucket = (index & (self._sub_bucket_half_count - 1)) + self._sub_bucket_half_count
+        if bucket < 0:
+            sub_bucket -= self._sub_bucket_half_count
+            bucket = 0
+        return ((sub_bucket + 1) << bucket) - 1
+
+    # -----------------------------
+    # Запись
+    # -----------------------------
+    def record_us(self, value_us: int, count: int = 1) -> None:
+        if value_us < 0:
+            value_us = 0
+        elif value_us > self.highest_us:
+            value_us = self.highest_us
+        idx = self._index_of(value_us)
+        counts = self._counts
+        counts[idx] = counts.get(idx, 0) + count
+        if self.total == 0 or value_us < self.min_us:
+            self.min_us = value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+        self.total += count
+        self.sum_us += value_us * count
+
+    def record_ms(self, value_ms: float) -> None:
+        self.record_us(int(value_ms * 1000 + 0.5))
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """
+        Влить другую гистограмму в эту. При разной конфигурации значения переносятся по ячейкам.
+        """
+        if not other.total:
+            return self
+        if (other.significant_digits, other.highest_us) == (self.significant_digits, self.highest_us):
+            counts = self._counts
+            for idx, c in other._counts.items():
+                counts[idx] = counts.get(idx, 0) + c
+            if self.total == 0 or other.min_us < self.min_us:
+                self.min_us = other.min_us
+            self.max_us = max(self.max_us, other.max_us)
+            self.total += other.total
+            self.sum_us += other.sum_us
+        else:
+            for idx, c in other._counts.items():
+                self.record_us(other._highest_equivalent(idx), c)
+        return self
+
+    # -----------------------------
+    # Чтение
+    # -----------------------------
+    def percentiles_us(self, percentiles: Iterable[float]) -> dict[float, int]:
+        """
+        Значения для нескольких перцентилей за один проход по счётчикам.
+        """
+        wanted = sorted(set(percentiles))
+        result: dict[float, int] = {}
+        if not self.total:
+            return {p: 0 for p in wanted}
+        targets = [(p, max(1, math.ceil(p / 100.0 * self.total))) for p in wanted]
+        pos = 0
+        seen = 0
+        counts = self._counts
+        for idx in sorted(counts):
+            seen += counts[idx]
+            while pos < len(targets) and seen >= targets[pos][1]:
+                p = targets[pos][0]
+                result[p] = min(self._highest_equivalent(idx), self.max_us)
+                pos += 1
+            if pos == len(targets):
+                break
+        return result
+
+    def mean_us(self) -> float:
+        return self.sum_us / self.total if self.total else 0.0
+
+    def stddev_us(self) -> float:
+        """
+        Стандартное отклонение по ячейкам гистограммы.
+        """
+        if self.total < 2:
+            return 0.0
+        mean = self.mean_us()
+        acc = 0.0
+        for idx, c in self._counts.items():
+            acc += c * (self._highest_equivalent(idx) - mean) ** 2
+        return math.sqrt(acc / (self.total - 1))
+
+    def to_stats(self) -> dict:
+        """
+        Сводка в миллисекундах в формате отчёта /requests.
+        """
+        if not self.total:
+            return {
+                "min_ms": 0.0, "median_ms": 0.0, "avg_ms": 0.0, "p90_ms": 0.0,
+                "p95_ms": 0.0, "p99_ms": 0.0, "p999_ms": 0.0, "max_ms": 0.0,
+            }
+        p = self.percentiles_us(REPORT_PERCENTILES)
+        return {
+            "min_ms": round(self.min_us / 1000, 3),
+            "median_ms": round(p[50.0] / 1000, 3),
+            "avg_ms": round(self.mean_us() / 1000, 3),
+            "p90_ms": round(p[90.0] / 1000, 3),
+            "p95_ms": round(p[95.0] / 1000, 3),
+            "p99_ms": round(p[99.0] / 1000, 3),
+            "p999_ms": round(p[99.9] / 1000, 3),
+            "max_ms": round(self.max_us / 1000, 3),
+        }
+
+    # -----------------------------
+    # Сериализация (для передачи между процессами и хранения)
+    # -----------------------------
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(
+            self.significant_digits | _SPARSE_FLAG, self.highest_us, self.total, self.min_us, self.max_us, self.sum_us
+        )
+        pairs = array("q")
+        prev = 0
+        for idx in sorted(self._counts):
+            pairs.append(idx - prev)
+            pairs.append(self._counts[idx])
+            prev = idx
+        return header + zlib.compress(pairs.tobytes(), 1)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "LatencyHistogram":
+        """
+        Разобрать to_bytes. Понимает и прежний плотный формат (в истории прогонов), в том числе
+        с точностью 5 цифр — такая гистограмма читается, но новые с ней не создаются.
+        """
+        digits, highest, total, min_us, max_us, sum_us = _HEADER.unpack_from(data)
+        sparse = bool(digits & _SPARSE_FLAG)
+        digits &= ~_SPARSE_FLAG
+        if not 1 <= digits <= 5 or highest < 2:
+            raise ValueError("Invalid histogram header")
+        hist = cls._layout(digits, highest)
+        values = array("q")
+        values.frombytes(zlib.decompress(data[_HEADER.size:]))
+        if sparse:
+            if len(values) % 2:
+                raise ValueError("Histogram layout mismatch")
+            hist._counts = dict(zip(itertools.accumulate(values[::2]), values[1::2]))
+        else:
+            if len(values) != hist._dense_size():
+                raise ValueError("Histogram layout mismatch")
+            hist._counts = {idx: c for idx, c in enumerate(values) if c}
+        hist.total, hist.min_us, hist.max_us, hist.sum_us = total, min_us, max_us, sum_us
+        return hist
+
+    def encode(self) -> str:
+        return base64.b64encode(self.to_bytes()).decode("ascii")
+
+    @classmethod
+    def decode(cls, data: str) -> "LatencyHistogram":
+        return cls.from_bytes(base64.b64decode(data))
+
+
+def mann_whitney(a: LatencyHistogram, b: LatencyHistogram) -> dict:
+    """
+    U-критерий Манна — Уитни по двум гистограммам (нормальное приближение, двусторонний).
+    Не предполагает нормальности — подходит для распределений задержек с тяжёлым хвостом.
+    prob_b_slower — вероятность, что случайный замер из b больше случайного замера из a.
+    """
+    if not a.total or not b.total:
+        return {"u": 0.0, "z": 0.0, "p_value": 1.0, "prob_b_slower": 0.5}
+    if (a.significant_digits, a.highest_us) != (b.significant_digits, b.highest_us):
+        b = LatencyHistogram._layout(a.significant_digits, a.highest_us).merge(b)
+    u_b = 0.0
+    a_below = 0
+    for idx in sorted(a._counts.keys() | b._counts.keys()):
+        ca, cb = a._counts.get(idx, 0), b._counts.get(idx, 0)
+        if cb:
+            u_b += cb * (a_below + 0.5 * ca)
+        a_below += ca
+    n_a, n_b = a.total, b.total
+    mean_u = n_a * n_b / 2
+    sigma_u = math.sqrt(n_a * n_b * (n_a + n_b + 1) / 12)
+    z = (u_b - mean_u) / sigma_u if sigma_u else 0.0
+    return {
+        "u": u_b,
+        "z": round(z, 4),
+        "p_value": math.erfc(abs(z) / math.sqrt(2)),
+        "prob_b_slower": round(u_b / (n_a * n_b), 4),
+    }
@@ -0,0 +1,252 @@
+"""
+История прогонов в локальной SQLite: конфигурация, сводка, гистограммы по скриптам,
+хэши содержимого скриптов и целевая БД. Позволяет сравнивать любые два прогона
+и автоматически отмечать замедления относительно базового.
+"""
+import json
+import sqlite3
+import datetime
+from pathlib import Path
+
+from psycopg.conninfo import conninfo_to_dict, make_conninfo
+
+from histogram import LatencyHistogram, mann_whitney
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at   TEXT    NOT NULL,
+    kind         TEXT    NOT NULL,
+    status       TEXT    NOT NULL,
+    target       TEXT    NOT NULL,
+    config       TEXT    NOT NULL,
+    summary      TEXT    NOT NULL,
+    wall_time_ms REAL    NOT NULL,
+    is_baseline  INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS run_scripts (
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    n           INTEGER NOT NULL,
+    script_hash TEXT    NOT NULL,
+    count       INTEGER NOT NULL,
+    errors      INTEGER NOT NULL,
+    stats       TEXT    NOT NULL,
+    histogram   BLOB    NOT NULL,
+    PRIMARY KEY (run_id, n)
+);
+CREATE INDEX IF NOT EXISTS runs_target_baseline ON runs(target, kind, is_baseline);
+"""
+
+# Метрики, по которым считается дельта в сравнении
+DIFF_METRICS = ("avg_ms", "median_ms", "p95_ms", "p99_ms")
+
+
+def redact_dsn(dsn: str) -> str:
+    """
+    DSN без пароля — в таком виде целевая БД хранится в истории.
+    """
+    try:
+        params = conninfo_to_dict(dsn)
+    except Exception:
+        return dsn
+    params.pop("password", None)
+    return make_conninfo(**params)
+
+
+class HistoryStore:
+    """
+    Хранилище прогонов. Соединение открывается на каждую операцию — вызовы идут
+    из разных потоков, а операции короткие.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    # -----------------------------
+    # Запись
+    # -----------------------------
+    def save_run(
+        self,
+        kind: str,
+        report: dict,
+        target: str,
+        scripts: dict[int, tuple[str, LatencyHistogram, int]],
+    ) -> int:
+        """
+        Сохранить прогон. scripts: номер -> (хэш содержимого, гистограмма, число ошибок).
+        """
+        created_at = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO runs (created_at, kind, status, target, config, summary, wall_time_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    created_at,
+                    kind,
+                    report["status"],
+                    target,
+                    json.dumps({k: v for k, v in report["config"].items() if k != "db_dsn"}, ensure_ascii=False),
+                    json.dumps(report["summary"], ensure_ascii=False),
+                    report["summary"]["wall_time_ms"],
+                ),
+            )
+            run_id = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO run_scripts (run_id, n, script_hash, count, errors, stats, histogram) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, n, h, hist.total, errors, json.dumps(hist.to_stats()), hist.to_bytes())
+                    for n, (h, hist, errors) in scripts.items()
+                ],
+            )
+        return run_id
+
+    def set_baseline(self, run_id: int) -> dict:
+        """
+        Отметить прогон базовым для его целевой БД и вида прогона (предыдущий базовый снимается).
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT target, kind FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                raise KeyError(run_id)
+            conn.execute(
+                "UPDATE runs SET is_baseline = 0 WHERE target = ? AND kind = ?", (row["target"], row["kind"])
+            )
+            conn.execute("UPDATE runs SET is_baseline = 1 WHERE id = ?", (run_id,))
+        return {"run_id": run_id, "target": row["target"], "kind": row["kind"]}
+
+    def delete_run(self, run_id: int) -> bool:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM runs WHERE id = ?", (run_id,)).rowcount > 0
+
+    # -----------------------------
+    # Чтение
+    # -----------------------------
+    @staticmethod
+    def _run_row(row: sqlite3.Row) -> dict:
+        return {
+            "id": row["id"],
+            "created_at": row["created_at"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "target": row["target"],
+            "is_baseline": bool(row["is_baseline"]),
+            "config": json.loads(row["config"]),
+            "summary": json.loads(row["summary"]),
+        }
+
+    def list_runs(self, limit: int = 50, offset: int = 0, target: str | None = None) -> list[dict]:
+        query = "SELECT * FROM runs"
+        params: list = []
+        if target:
+            query += " WHERE target = ?"
+            params.append(target)
+        query += " ORDER BY id DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._connect() as conn:
+            return [self._run_row(r) for r in conn.execute(query, params)]
+
+    def get_run(self, run_id: int) -> dict | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            run = self._run_row(row)
+            run["by_script"] = {
+                r["n"]: {
+                    "script": f"{r['n']}.sql",
+                    "script_hash": r["script_hash"],
+                    "count": r["count"],
+                    "errors": r["errors"],
+                    "stats": json.loads(r["stats"]),
+                }
+                for r in conn.execute("SELECT n, script_hash, count, errors, stats FROM run_scripts WHERE run_id = ? ORDER BY n", (run_id,))
+            }
+        return run
+
+    def baseline_id(self, target: str, kind: str) -> int | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM runs WHERE target = ? AND kind = ? AND is_baseline = 1 ORDER BY id DESC LIMIT 1",
+                (target, kind),
+            ).fetchone()
+        return row["id"] if row else None
+
+    def _histograms(self, run_id: int) -> dict[int, tuple[str, LatencyHistogram, int]]:
+        with self._connect() as conn:
+            return {
+                r["n"]: (r["script_hash"], LatencyHistogram.from_bytes(r["histogram"]), r["errors"])
+                for r in conn.execute("SELECT n, script_hash, errors, histogram FROM run_scripts WHERE run_id = ?", (run_id,))
+            }
+
+    # -----------------------------
+    # Сравнение
+    # -----------------------------
+    def diff(self, base_id: int, run_id: int, threshold_pct: float, alpha: float) -> dict:
+        """
+        Сравнить прогон run_id с base_id по скриптам: дельты задержек и пропускной способности,
+        U-критерий Манна — Уитни по гистограммам. Замедление больше threshold_pct при p < alpha
+        считается регрессией.
+        """
+        base = self.get_run(base_id)
+        run = self.get_run(run_id)
+        if base is None or run is None:
+            raise KeyError(base_id if base is None else run_id)
+        base_hists = self._histograms(base_id)
+        run_hists = self._histograms(run_id)
+        base_wall_s = max(base["summary"]["wall_time_ms"], 1e-9) / 1000
+        run_wall_s = max(run["summary"]["wall_time_ms"], 1e-9) / 1000
+
+        by_script = {}
+        regressions = []
+        for n in sorted(set(base_hists) | set(run_hists)):
+            if n not in base_hists or n not in run_hists:
+                by_script[n] = {"script": f"{n}.sql", "only_in": "base" if n in base_hists else "run"}
+                continue
+            b_hash, b_hist, _ = base_hists[n]
+            r_hash, r_hist, _ = run_hists[n]
+            b_stats, r_stats = b_hist.to_stats(), r_hist.to_stats()
+            delta_pct = {m: _pct(b_stats[m], r_stats[m]) for m in DIFF_METRICS}
+            b_tp, r_tp = b_hist.total / base_wall_s, r_hist.total / run_wall_s
+            delta_pct["throughput_rps"] = _pct(b_tp, r_tp)
+            test = mann_whitney(b_hist, r_hist)
+            significant = test["p_value"] < alpha
+            slowdown = max(delta_pct["median_ms"], delta_pct["p95_ms"])
+            regression = significant and test["z"] > 0 and slowdown > threshold_pct
+            by_script[n] = {
+                "script": f"{n}.sql",
+                "script_changed": b_hash != r_hash,
+                "base": {**b_stats, "count": b_hist.total, "throughput_rps": round(b_tp, 3)},
+                "run": {**r_stats, "count": r_hist.total, "throughput_rps": round(r_tp, 3)},
+                "delta_pct": delta_pct,
+                "mann_whitney": test,
+                "significant": significant,
+                "regression": regression,
+            }
+            if regression:
+                regressions.append({"script": f"{n}.sql", "slowdown_pct": slowdown, "p_value": test["p_value"]})
+
+        return {
+            "base": {k: base[k] for k in ("id", "created_at", "kind", "target", "is_baseline")},
+            "run": {k: run[k] for k in ("id", "created_at", "kind", "target", "is_baseline")},
+            "same_target": base["target"] == run["target"],
+            "threshold_pct": threshold_pct,
+            "alpha": alpha,
+            "regressions": regressions,
+            "by_script": by_script,
+        }
+
+
+def _pct(old: float, new: float) -> float:
+    if not old:
+        return 0.0
+    return round((new - old) / old * 100, 2)
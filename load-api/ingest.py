@@ -0,0 +1,102 @@
+"""
+Пакетная загрузка скриптов: tar (в том числе .tar.gz/.tar.bz2/.tar.xz), zip или NDJSON.
+
+Тело запроса сначала потоково пишется во временный файл, потом читается отсюда по одному
+скрипту — в памяти одновременно только текущий файл архива. tar читается одним проходом
+в порядке архива (содержимое — во второй временный файл), затем отдаётся в естественном порядке.
+
+    tar/zip — берутся файлы *.sql в естественном порядке путей (2.sql раньше 10.sql);
+    ndjson  — по строке на скрипт: {"content": "..."} (поле name необязательно) или просто "...".
+"""
+import re
+import json
+import tarfile
+import tempfile
+import zipfile
+from typing import BinaryIO, Iterator
+
+BULK_FORMATS = ("auto", "tar", "zip", "ndjson")
+
+_DIGITS_RE = re.compile(r"(\d+)")
+
+
+def _natural_key(name: str) -> list:
+    return [int(part) if part.isdigit() else part.lower() for part in _DIGITS_RE.split(name)]
+
+
+def _is_script(name: str) -> bool:
+    base = name.rsplit("/", 1)[-1]
+    # служебные файлы архиваторов (__MACOSX/, ._name) скриптами не считаем
+    return base.lower().endswith(".sql") and not base.startswith(".") and "__MACOSX/" not in name
+
+
+def detect_format(f: BinaryIO) -> str:
+    head = f.read(4)
+    f.seek(0)
+    if head == b"PK\x03\x04":
+        return "zip"
+    try:
+        with tarfile.open(fileobj=f, mode="r:*"):
+            return "tar"
+    except tarfile.TarError:
+        return "ndjson"
+    finally:
+        f.seek(0)
+
+
+def iter_bundle(f: BinaryIO, fmt: str) -> Iterator[tuple[str, bytes]]:
+    """
+    Скрипты пакета по одному: (имя для сообщений об ошибках, содержимое).
+    Ошибки формата — ValueError.
+    """
+    if fmt == "auto":
+        fmt = detect_format(f)
+    if fmt == "zip":
+        try:
+            archive = zipfile.ZipFile(f)
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"Invalid zip archive: {e}")
+        with archive:
+            names = sorted((i.filename for i in archive.infolist() if not i.is_dir() and _is_script(i.filename)), key=_natural_key)
+            for name in names:
+                yield name, archive.read(name)
+    elif fmt == "tar":
+        try:
+            # потоковое чтение: у сжатого архива обратный seek заново распаковывает поток с начала,
+            # поэтому файлы читаются в порядке архива, а естественный порядок наводится потом
+            archive = tarfile.open(fileobj=f, mode="r|*")
+        except tarfile.TarError as e:
+            raise ValueError(f"Invalid tar archive: {e}")
+        with archive, tempfile.TemporaryFile() as spool:
+            # содержимое складывается в несжатом виде во временный файл: (ключ, имя, смещение, размер)
+            index = []
+            try:
+                for member in archive:
+                    if member.isfile() and _is_script(member.name):
+                        data = archive.extractfile(member).read()
+                        index.append((_natural_key(member.name), member.name, spool.tell(), len(data)))
+                        spool.write(data)
+            except tarfile.TarError as e:
+                raise ValueError(f"Invalid tar archive: {e}")
+            index.sort(key=lambda item: item[0])
+            for _key, name, offset, size in index:
+                spool.seek(offset)
+                yield name, spool.read(size)
+    elif fmt == "ndjson":
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {lineno}: invalid JSON: {e}")
+            if isinstance(item, dict):
+                content = item.get("content")
+                name = str(item.get("name") or f"line {lineno}")
+            else:
+                content, name = item, f"line {lineno}"
+            if not isinstance(content, str):
+                raise ValueError(f"line {lineno}: expected a string or an object with 'content'")
+            yield name, content.encode("utf-8")
+    else:
+        raise ValueError(f"Unknown format '{fmt}' (expected one of {', '.join(BULK_FORMATS)})")
@@ -0,0 +1,154 @@
+"""
+Фоновые задания: долгий прогон (/requests, /load) запускается в фоне, клиент опрашивает
+прогресс и может отменить прогон.
+
+RunScope — контекст прогона-задания, доступный исполнителю запусков через contextvar:
+соединения, на которых сейчас идут запросы (отмена отправляет на них cancel в PostgreSQL),
+лимит statement_timeout и счётчики прогресса.
+"""
+import time
+import uuid
+import asyncio
+import datetime
+import threading
+import contextvars
+from collections import deque
+
+JOB_KINDS = ("requests", "load")
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+
+# Окно, по которому считается текущая пропускная способность, секунд
+THROUGHPUT_WINDOW_S = 5
+
+
+class RunScope:
+    __slots__ = ("statement_timeout_ms", "completed", "errors", "_conns", "_lock", "_seconds")
+
+    def __init__(self, statement_timeout_ms: int | None):
+        self.statement_timeout_ms = statement_timeout_ms
+        self.completed = 0
+        self.errors = 0
+        self._conns: set = set()
+        self._lock = threading.Lock()
+        # (секунда от монотонных часов, завершено за неё) — для текущей пропускной способности
+        self._seconds: deque[list[int]] = deque(maxlen=THROUGHPUT_WINDOW_S + 1)
+
+    # соединения вызываются из потоков исполнителя — под блокировкой
+    def attach(self, conn) -> None:
+        with self._lock:
+            self._conns.add(conn)
+
+    def detach(self, conn) -> None:
+        with self._lock:
+            self._conns.discard(conn)
+
+    def cancel_running(self) -> int:
+        """
+        Отправить cancel запросам, которые сейчас выполняются (блокирующий вызов, по одному
+        запросу отмены на соединение). Вернуть число соединений.
+        """
+        with self._lock:
+            conns = list(self._conns)
+        for conn in conns:
+            try:
+                conn.cancel()
+            except Exception:
+                pass  # запрос успел завершиться или соединение закрыто
+        return len(conns)
+
+    def record(self, ok: bool) -> None:
+        if not ok:
+            self.errors += 1
+            return
+        self.completed += 1
+        second = int(time.monotonic())
+        if self._seconds and self._seconds[-1][0] == second:
+            self._seconds[-1][1] += 1
+        else:
+            self._seconds.append([second, 1])
+
+    def throughput(self) -> float:
+        """
+        Завершённых запусков в секунду за последние THROUGHPUT_WINDOW_S полных секунд.
+        """
+        now = int(time.monotonic())
+        done = sum(count for second, count in self._seconds if now - THROUGHPUT_WINDOW_S <= second < now)
+        return round(done / THROUGHPUT_WINDOW_S, 3)
+
+
+# Контекст задания для текущего запуска; вне задания — None
+current_scope: contextvars.ContextVar[RunScope | None] = contextvars.ContextVar("current_scope", default=None)
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+class Job:
+    __slots__ = (
+        "id", "kind", "params", "status", "created_at", "started_at", "finished_at",
+        "scope", "expected", "task", "result", "error", "_started_monotonic", "_finished_monotonic",
+    )
+
+    def __init__(self, kind: str, params: dict, scope: RunScope, expected: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.created_at = _now()
+        self.started_at: str | None = None
+        self.finished_at: str | None = None
+        self.scope = scope
+        self.expected = expected
+        self.task: asyncio.Task | None = None
+        self.result: dict | None = None
+        self.error: str | None = None
+        self._started_monotonic: float | None = None
+        self._finished_monotonic: float | None = None
+
+    def mark_running(self) -> None:
+        self.status = "running"
+        self.started_at = _now()
+        self._started_monotonic = time.monotonic()
+
+    def mark_finished(self, status: str, error: str | None = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = _now()
+        self._finished_monotonic = time.monotonic()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def progress(self) -> dict:
+        scope = self.scope
+        done = scope.completed + scope.errors
+        elapsed = 0.0
+        if self._started_monotonic is not None:
+            elapsed = (self._finished_monotonic or time.monotonic()) - self._started_monotonic
+        return {
+            "completed": scope.completed,
+            "errors": scope.errors,
+            "expected": self.expected,
+            "percent": round(min(100.0, done / self.expected * 100), 2) if self.expected else None,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": scope.throughput() if not self.finished else None,
+        }
+
+    def to_dict(self, include_result: bool = False) -> dict:
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "params": self.params,
+            "progress": self.progress(),
+        }
+        if self.error:
+            data["error"] = self.error
+        if include_result and self.result is not None:
+            data["result"] = self.result
+        return data
@@ -0,0 +1,200 @@
+"""
+Метрики для Prometheus (/metrics) без внешних зависимостей: текстовый формат exposition 0.0.4.
+
+Запись идёт на горячем пути каждого запуска, поэтому без блокировок: у каждого потока свой
+накопитель (threading.local), блокировка берётся один раз — при регистрации накопителя потока.
+Чтение (/metrics) суммирует накопители всех потоков; несогласованность на одну-две записи
+между счётчиками одной выборки для Prometheus не важна. Накопители завершившихся потоков
+остаются — счётчики монотонны.
+"""
+import bisect
+import asyncio
+import threading
+from typing import Any, Callable, Iterable
+
+# Границы бакетов гистограммы задержек по умолчанию, секунд
+DEFAULT_BUCKETS_S = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+RUN_LABELS = ("script", "mode", "target")
+
+
+class _Shard:
+    __slots__ = ("series", "in_flight")
+
+    def __init__(self):
+        # метки -> [счётчики бакетов..., +Inf, сумма секунд, запусков, ошибок]
+        self.series: dict[tuple, list] = {}
+        self.in_flight = 0
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class RunMetrics:
+    """
+    Счётчики запусков и ошибок, гистограмма длительности и число выполняющихся запусков
+    в разрезе RUN_LABELS.
+    """
+
+    def __init__(self, buckets_s: Iterable[float] = DEFAULT_BUCKETS_S):
+        self.buckets = tuple(sorted(buckets_s))
+        self._local = threading.local()
+        self._shards: list[_Shard] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    # -----------------------------
+    # Запись (горячий путь)
+    # -----------------------------
+    def started(self) -> None:
+        self._shard().in_flight += 1
+
+    def finished(self, labels: tuple, seconds: float | None, error: bool = False) -> None:
+        """
+        Запуск завершился: seconds — длительность (None — не учитывать в гистограмме),
+        error — запуск упал. Вызывается в том же потоке, что и started().
+        """
+        shard = self._shard()
+        shard.in_flight -= 1
+        series = shard.series.get(labels)
+        nb = len(self.buckets)
+        if series is None:
+            series = shard.series[labels] = [0] * (nb + 1) + [0.0, 0, 0]
+        series[nb + 2] += 1
+        if error:
+            series[nb + 3] += 1
+        elif seconds is not None:
+            series[bisect.bisect_left(self.buckets, seconds)] += 1
+            series[nb + 1] += seconds
+
+    # -----------------------------
+    # Чтение
+    # -----------------------------
+    def in_flight(self) -> int:
+        return sum(shard.in_flight for shard in list(self._shards))
+
+    def _collect(self) -> dict[tuple, list]:
+        total: dict[tuple, list] = {}
+        for shard in list(self._shards):
+            for labels, series in list(shard.series.items()):
+                acc = total.get(labels)
+                if acc is None:
+                    total[labels] = list(series)
+                else:
+                    for i, value in enumerate(series):
+                        acc[i] += value
+        return total
+
+    def render(self, prefix: str) -> list[str]:
+        nb = len(self.buckets)
+        collected = sorted(self._collect().items())
+        lines = [
+            f"# HELP {prefix}_runs_total Script runs finished, including failed ones.",
+            f"# TYPE {prefix}_runs_total counter",
+        ]
+        lines += [f"{prefix}_runs_total{_labels(RUN_LABELS, k)} {s[nb + 2]}" for k, s in collected]
+        lines += [
+            f"# HELP {prefix}_run_errors_total Script runs that failed.",
+            f"# TYPE {prefix}_run_errors_total counter",
+        ]
+        lines += [f"{prefix}_run_errors_total{_labels(RUN_LABELS, k)} {s[nb + 3]}" for k, s in collected]
+        lines += [
+            f"# HELP {prefix}_run_duration_seconds Duration of successful script runs.",
+            f"# TYPE {prefix}_run_duration_seconds histogram",
+        ]
+        les = [f'le="{bound}"' for bound in self.buckets] + ['le="+Inf"']
+        for k, s in collected:
+            cumulative = 0
+            for le, count in zip(les, s):
+                cumulative += count
+                lines.append(f"{prefix}_run_duration_seconds_bucket{_labels(RUN_LABELS, k, le)} {cumulative}")
+            lines.append(f"{prefix}_run_duration_seconds_sum{_labels(RUN_LABELS, k)} {_number(s[nb + 1])}")
+            lines.append(f"{prefix}_run_duration_seconds_count{_labels(RUN_LABELS, k)} {cumulative}")
+        return lines
+
+
+# Состояние вызова, отправленного в пул потоков (см. ExecutorLoad.run)
+_QUEUED, _STARTED, _ABANDONED = range(3)
+
+
+class ExecutorLoad:
+    """
+    Загрузка пулов потоков по собственным счётчикам, без внутренностей ThreadPoolExecutor:
+    вызовы в очереди (отправлены, не начаты) и выполняющиеся — в разрезе метки пула.
+    Вызов уходит из очереди либо в потоке, который его начал, либо в event loop, если ожидание
+    отменили раньше (снятые с очереди при shutdown(cancel_futures=True) не начнутся никогда), —
+    поэтому переход под блокировкой.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queued: dict[str, int] = {}
+        self._active: dict[str, int] = {}
+
+    async def run(self, executor, label: str, fn: Callable[..., Any], *args) -> Any:
+        """
+        loop.run_in_executor(executor, fn, *args) с учётом вызова под меткой label.
+        """
+        state = _QUEUED
+
+        def _call():
+            nonlocal state
+            with self._lock:
+                if state == _QUEUED:
+                    self._queued[label] -= 1
+                state = _STARTED
+                self._active[label] += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._active[label] -= 1
+
+        with self._lock:
+            self._queued[label] = self._queued.get(label, 0) + 1
+            self._active.setdefault(label, 0)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, _call)
+        finally:
+            with self._lock:
+                if state == _QUEUED:
+                    self._queued[label] -= 1
+                    state = _ABANDONED
+
+    def queued(self, label: str) -> int:
+        return self._queued.get(label, 0)
+
+    def active(self, label: str) -> int:
+        return self._active.get(label, 0)
+
+
+def render_gauge(name: str, help_text: str, samples: Iterable[tuple[dict, float]]) -> list[str]:
+    """
+    Гауж в текстовом формате: samples — пары (метки, значение).
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+    return lines
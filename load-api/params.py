@@ -0,0 +1,183 @@
+"""
+Параметризованные скрипты: плейсхолдеры %(name)s и директивы генераторов в комментариях.
+
+    -- @param user_id range 1 100000
+    -- @param email   sample marketplace.users email
+    -- @param city    csv cities.csv city
+    -- @param status  list new,paid,shipped
+    SELECT * FROM marketplace.orders WHERE user_id = %(user_id)s;
+
+Перед прогоном значения генерируются один раз в колоночные массивы (ParamSet), на горячем
+пути берётся только следующий индекс. Запросы уходят с настоящими bind-параметрами:
+%(name)s заменяется на позиционный %s, остальные «%» экранируются.
+"""
+import re
+import csv
+import random
+import itertools
+from array import array
+from pathlib import Path
+from typing import Callable
+
+from sqltext import split_statements
+
+PLACEHOLDER_RE = re.compile(r"%\((\w+)\)s")
+_DIRECTIVE_RE = re.compile(r"^\s*--\s*@param\s+(\w+)\s+(\w+)\s*(.*?)\s*$", re.MULTILINE)
+
+GENERATORS = ("range", "sample", "csv", "list")
+
+
+class ParamSpec:
+    __slots__ = ("name", "kind", "args")
+
+    def __init__(self, name: str, kind: str, args: list[str]):
+        self.name = name
+        self.kind = kind
+        self.args = args
+
+    def describe(self) -> str:
+        return " ".join([self.kind, *self.args])
+
+
+class ScriptTemplate:
+    """
+    Разобранный параметризованный скрипт: операторы с позиционными плейсхолдерами
+    и порядком имён параметров для каждого, плюс спецификации генераторов.
+    """
+
+    __slots__ = ("statements", "specs")
+
+    def __init__(self, statements: list[tuple[str, tuple[str, ...]]], specs: dict[str, ParamSpec]):
+        self.statements = statements
+        self.specs = specs
+
+
+def _to_positional(statement: str) -> tuple[str, tuple[str, ...]]:
+    names: list[str] = []
+    parts: list[str] = []
+    pos = 0
+    for m in PLACEHOLDER_RE.finditer(statement):
+        parts.append(statement[pos:m.start()].replace("%", "%%"))
+        parts.append("%s")
+        names.append(m.group(1))
+        pos = m.end()
+    if not names:
+        # без параметров оператор выполняется как есть, «%» экранировать не нужно
+        return statement, ()
+    parts.append(statement[pos:].replace("%", "%%"))
+    return "".join(parts), tuple(names)
+
+
+def parse_template(sql: str) -> ScriptTemplate | None:
+    """
+    Разобрать скрипт. None — если в нём нет ни директив @param, ни плейсхолдеров
+    (такой скрипт выполняется целиком одним запросом, как раньше).
+    """
+    specs: dict[str, ParamSpec] = {}
+    for m in _DIRECTIVE_RE.finditer(sql):
+        name, kind, rest = m.group(1), m.group(2).lower(), m.group(3)
+        if kind not in GENERATORS:
+            raise ValueError(f"@param {name}: unknown generator '{kind}' (expected one of {', '.join(GENERATORS)})")
+        specs[name] = ParamSpec(name, kind, rest.split())
+    if not specs and not PLACEHOLDER_RE.search(sql):
+        return None
+
+    statements = [_to_positional(stmt) for stmt in split_statements(sql)]
+    used = {name for _, names in statements for name in names}
+    missing = used - specs.keys()
+    if missing:
+        raise ValueError(f"No @param directive for: {', '.join(sorted(missing))}")
+    return ScriptTemplate(statements, {name: spec for name, spec in specs.items() if name in used})
+
+
+def _compact(values: list) -> array | list:
+    """
+    Целые и вещественные значения — в array (8 байт на значение), остальное — списком.
+    """
+    if values and all(type(v) is int for v in values):
+        return array("q", values)
+    if values and all(type(v) in (int, float) for v in values):
+        return array("d", values)
+    return values
+
+
+def _number(text: str) -> int | float:
+    return float(text) if any(c in text for c in ".eE") else int(text)
+
+
+class ParamSet:
+    """
+    Заранее сгенерированные наборы параметров скрипта: по массиву на параметр, size строк.
+    next_statements() потокобезопасен (itertools.count) и стоит один индекс плюс сборку кортежей.
+    """
+
+    __slots__ = ("size", "columns", "_statements", "_counter", "_describe")
+
+    def __init__(self, template: ScriptTemplate, columns: dict[str, array | list], size: int):
+        self.size = size
+        self.columns = columns
+        self._statements = [(text, [columns[name] for name in names]) for text, names in template.statements]
+        self._counter = itertools.count()
+        self._describe = {name: spec.describe() for name, spec in template.specs.items()}
+
+    def next_statements(self) -> list[tuple[str, tuple | None]]:
+        i = next(self._counter) % self.size
+        return [(text, tuple(col[i] for col in cols) if cols else None) for text, cols in self._statements]
+
+    def describe(self) -> dict:
+        return {"sets": self.size, "params": self._describe}
+
+
+def generate(
+    template: ScriptTemplate,
+    size: int,
+    *,
+    rng: random.Random,
+    sample_column: Callable[[str, str, int], list],
+    base_dir: Path,
+) -> ParamSet:
+    """
+    Сгенерировать size наборов параметров. sample_column(table, column, limit) -> значения
+    столбца из БД; пути csv — относительно base_dir.
+    """
+    columns: dict[str, array | list] = {}
+    for name, spec in template.specs.items():
+        args = spec.args
+        if spec.kind == "range":
+            if len(args) != 2:
+                raise ValueError(f"@param {name}: range needs LOW HIGH")
+            low, high = _number(args[0]), _number(args[1])
+            if low > high:
+                raise ValueError(f"@param {name}: LOW > HIGH")
+            if isinstance(low, int) and isinstance(high, int):
+                values = [rng.randint(low, high) for _ in range(size)]
+            else:
+                values = [rng.uniform(low, high) for _ in range(size)]
+        elif spec.kind == "list":
+            choices = [v for v in " ".join(args).split(",") if v.strip()]
+            if not choices:
+                raise ValueError(f"@param {name}: list needs comma-separated values")
+            values = rng.choices([v.strip() for v in choices], k=size)
+        elif spec.kind == "sample":
+            if len(args) != 2:
+                raise ValueError(f"@param {name}: sample needs TABLE COLUMN")
+            population = sample_column(args[0], args[1], size)
+            if not population:
+                raise ValueError(f"@param {name}: {args[0]}.{args[1]} returned no rows")
+            values = population if len(population) >= size else rng.choices(population, k=size)
+            rng.shuffle(values)
+        else:  # csv
+            if not 1 <= len(args) <= 2:
+                raise ValueError(f"@param {name}: csv needs FILE [COLUMN]")
+            path = (base_dir / args[0]).resolve()
+            if base_dir.resolve() not in path.parents:
+                raise ValueError(f"@param {name}: csv file must be inside the scripts directory")
+            with path.open(newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                column = args[1] if len(args) == 2 else (reader.fieldnames or [None])[0]
+                population = [row[column] for row in reader if row.get(column) not in (None, "")]
+            if not population:
+                raise ValueError(f"@param {name}: {args[0]} has no values in column '{column}'")
+            values = rng.choices(population, k=size)
+        columns[name] = _compact(values)
+    return ParamSet(template, columns, size)
@@ -0,0 +1,171 @@
+"""
+Серверная статистика PostgreSQL вокруг прогона: снимки pg_stat_statements, pg_stat_database
+и pg_statio_user_tables до и после, разница — по скриптам.
+
+Снимки снимаются на отдельном соединении (не из пула нагрузки). Учтите, что в разницу
+попадают и запросы других клиентов той же базы.
+"""
+import psycopg
+from psycopg.rows import dict_row
+
+from sqltext import normalize_statement
+
+# Поля pg_stat_statements, которые суммируются в разнице (PG13+; для старых версий см. _pgss_value)
+PGSS_FIELDS = (
+    "calls",
+    "total_exec_time",
+    "total_plan_time",
+    "plans",
+    "rows",
+    "shared_blks_hit",
+    "shared_blks_read",
+    "shared_blks_dirtied",
+    "shared_blks_written",
+    "temp_blks_read",
+    "temp_blks_written",
+)
+
+DATABASE_FIELDS = (
+    "xact_commit",
+    "xact_rollback",
+    "blks_read",
+    "blks_hit",
+    "tup_returned",
+    "tup_fetched",
+    "tup_inserted",
+    "tup_updated",
+    "tup_deleted",
+    "temp_files",
+    "temp_bytes",
+    "deadlocks",
+    "blk_read_time",
+    "blk_write_time",
+)
+
+STATIO_FIELDS = (
+    "heap_blks_read",
+    "heap_blks_hit",
+    "idx_blks_read",
+    "idx_blks_hit",
+    "toast_blks_read",
+    "toast_blks_hit",
+)
+
+
+def _pgss_value(row: dict, field: str) -> float:
+    if field == "total_exec_time" and field not in row:
+        return float(row.get("total_time") or 0)  # PG12 и старше
+    return float(row.get(field) or 0)
+
+
+def take_snapshot(dsn: str) -> dict:
+    """
+    Снять снимок счётчиков. Если расширение pg_stat_statements недоступно — в снимке
+    будет причина, остальные представления всё равно читаются.
+    """
+    snapshot: dict = {"pgss": None, "pgss_error": None, "database": {}, "tables": {}}
+    with psycopg.connect(dsn, autocommit=True, row_factory=dict_row) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT * FROM pg_stat_database WHERE datname = current_database()"
+            )
+            row = cur.fetchone() or {}
+            snapshot["database"] = {f: float(row.get(f) or 0) for f in DATABASE_FIELDS if f in row}
+
+            cur.execute("SELECT * FROM pg_statio_user_tables")
+            for row in cur.fetchall():
+                key = f"{row['schemaname']}.{row['relname']}"
+                snapshot["tables"][key] = {f: float(row.get(f) or 0) for f in STATIO_FIELDS}
+
+            try:
+                cur.execute(
+                    "SELECT * FROM pg_stat_statements "
+                    "WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())"
+                )
+                entries = {}
+                for row in cur.fetchall():
+                    key = (row.get("userid"), row.get("queryid"), row.get("toplevel", True))
+                    entries[key] = {
+                        "query": row.get("query") or "",
+                        **{f: _pgss_value(row, f) for f in PGSS_FIELDS},
+                    }
+                snapshot["pgss"] = entries
+            except psycopg.Error as e:
+                snapshot["pgss_error"] = str(e).strip()
+    return snapshot
+
+
+def _delta(after: dict, before: dict | None, fields) -> dict:
+    before = before or {}
+    return {f: round(after.get(f, 0) - before.get(f, 0), 3) for f in fields}
+
+
+def diff_snapshots(before: dict, after: dict, scripts: dict[int, list[str]]) -> dict:
+    """
+    Разница двух снимков. scripts: номер скрипта -> список его операторов;
+    операторы сопоставляются с записями pg_stat_statements по нормализованному тексту.
+    """
+    result: dict = {
+        "database": _delta(after["database"], before["database"], DATABASE_FIELDS),
+        "tables": {},
+        "by_script": {},
+    }
+    db = result["database"]
+    reads_hits = db.get("blks_read", 0) + db.get("blks_hit", 0)
+    db["cache_hit_ratio"] = round(db.get("blks_hit", 0) / reads_hits, 4) if reads_hits else None
+
+    for table, counters in after["tables"].items():
+        d = _delta(counters, before["tables"].get(table), STATIO_FIELDS)
+        if any(d.values()):
+            result["tables"][table] = d
+
+    if after["pgss"] is None:
+        result["pg_stat_statements"] = {"available": False, "reason": after["pgss_error"]}
+        return result
+    result["pg_stat_statements"] = {"available": True}
+
+    # Разница по нормализованному тексту запроса (несколько queryid с одним текстом суммируются)
+    by_text: dict[str, dict] = {}
+    before_pgss = before["pgss"] or {}
+    for key, entry in after["pgss"].items():
+        d = _delta(entry, before_pgss.get(key), PGSS_FIELDS)
+        if d["calls"] <= 0:
+            continue
+        acc = by_text.setdefault(normalize_statement(entry["query"]), dict.fromkeys(PGSS_FIELDS, 0.0))
+        for f in PGSS_FIELDS:
+            acc[f] += d[f]
+
+    for n, statements in scripts.items():
+        per_statement = []
+        totals = dict.fromkeys(PGSS_FIELDS, 0.0)
+        for stmt in statements:
+            d = by_text.get(normalize_statement(stmt))
+            item = {"statement": stmt[:200], "matched": d is not None}
+            if d is not None:
+                item.update(_server_summary(d))
+                for f in PGSS_FIELDS:
+                    totals[f] += d[f]
+            per_statement.append(item)
+        result["by_script"][n] = {
+            **_server_summary(totals),
+            "statements": per_statement,
+        }
+    return result
+
+
+def _server_summary(d: dict) -> dict:
+    calls = d["calls"]
+    return {
+        "calls": int(calls),
+        "mean_exec_ms": round(d["total_exec_time"] / calls, 3) if calls else 0.0,
+        "total_exec_ms": round(d["total_exec_time"], 3),
+        "mean_plan_ms": round(d["total_plan_time"] / d["plans"], 3) if d["plans"] else 0.0,
+        "total_plan_ms": round(d["total_plan_time"], 3),
+        "rows": int(d["rows"]),
+        "shared_blks_hit": int(d["shared_blks_hit"]),
+        "shared_blks_read": int(d["shared_blks_read"]),
+        "shared_blks_dirtied": int(d["shared_blks_dirtied"]),
+        "shared_blks_written": int(d["shared_blks_written"]),
+        "temp_blks_read": int(d["temp_blks_read"]),
+        "temp_blks_written": int(d["temp_blks_written"]),
+    }
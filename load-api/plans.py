@@ -0,0 +1,119 @@
+"""
+Выборочный захват планов: часть запусков выполняется под EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON),
+планы группируются по «отпечатку» — форме дерева узлов без оценок, счётчиков и времени.
+
+Один экземпляр плана хранится на каждый отпечаток; отчёт показывает, как задержка
+выборочных запусков делится между планами (смена плана под нагрузкой видна как несколько
+групп с разными медианами). План хранится как есть — JSON-массив из EXPLAIN, тот же формат
+принимает ExplainJsonParser анализатора SqlAnalyzer.
+"""
+import json
+import hashlib
+
+from histogram import LatencyHistogram
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+
+# Поля узла, задающие форму плана; стоимости, строки, время и буферы в отпечаток не входят
+_SHAPE_KEYS = (
+    "Node Type", "Strategy", "Partial Mode", "Operation", "Join Type", "Parent Relationship",
+    "Subplan Name", "CTE Name", "Relation Name", "Schema", "Index Name", "Scan Direction",
+)
+
+
+def _node_shape(node: dict) -> list:
+    return [
+        [node.get(key) for key in _SHAPE_KEYS],
+        [_node_shape(child) for child in node.get("Plans", ())],
+    ]
+
+
+def plan_fingerprint(explain: list | dict | None) -> str | None:
+    """
+    Отпечаток плана из результата EXPLAIN (FORMAT JSON). None — оператор без плана.
+    """
+    if explain is None:
+        return None
+    root = explain[0] if isinstance(explain, list) else explain
+    shape = json.dumps(_node_shape(root["Plan"]), separators=(",", ":"))
+    return hashlib.sha1(shape.encode("utf-8")).hexdigest()[:16]
+
+
+def _server_ms(explain: list | dict | None) -> float:
+    if explain is None:
+        return 0.0
+    root = explain[0] if isinstance(explain, list) else explain
+    return float(root.get("Planning Time", 0.0)) + float(root.get("Execution Time", 0.0))
+
+
+class PlanCapture:
+    """
+    Планы выборочных запусков по скриптам. Запуск — список результатов EXPLAIN по операторам
+    (None у операторов, которые EXPLAIN не поддерживают); отпечаток запуска — сочетание
+    отпечатков операторов. Различных планов на скрипт не больше max_plans, остальные
+    запуски учитываются в other.
+    """
+
+    def __init__(self, max_plans: int, hist_precision: int):
+        self.max_plans = max_plans
+        self.hist_precision = hist_precision
+        self._scripts: dict[int, dict] = {}
+
+    def add(self, n: int, duration_ms: float, explains: list) -> None:
+        fingerprints = [plan_fingerprint(e) for e in explains]
+        key = hashlib.sha1("|".join(fp or "-" for fp in fingerprints).encode("utf-8")).hexdigest()[:16]
+        script = self._scripts.setdefault(n, {"sampled": 0, "other": 0, "plans": {}})
+        script["sampled"] += 1
+        group = script["plans"].get(key)
+        if group is None:
+            if len(script["plans"]) >= self.max_plans:
+                script["other"] += 1
+                return
+            group = script["plans"][key] = {
+                "fingerprint": key,
+                "count": 0,
+                "_latency": LatencyHistogram(self.hist_precision),
+                "_server": LatencyHistogram(self.hist_precision),
+                "statements": [
+                    {"statement": i, "fingerprint": fp, "plan": e}
+                    for i, (fp, e) in enumerate(zip(fingerprints, explains))
+                ],
+            }
+        group["count"] += 1
+        group["_latency"].record_ms(duration_ms)
+        group["_server"].record_ms(sum(_server_ms(e) for e in explains))
+
+    def sampled(self) -> int:
+        return sum(script["sampled"] for script in self._scripts.values())
+
+    def report(self, n: int, statement_texts: list[str], include_histograms: bool) -> dict | None:
+        """
+        Группы планов скрипта, самая частая первой: доля запусков, задержка запуска под EXPLAIN
+        (latency) и серверное время планирования+выполнения по данным EXPLAIN (server).
+        """
+        script = self._scripts.get(n)
+        if script is None:
+            return None
+        groups = []
+        for group in sorted(script["plans"].values(), key=lambda g: -g["count"]):
+            latency, server = group["_latency"], group["_server"]
+            item = {
+                "fingerprint": group["fingerprint"],
+                "count": group["count"],
+                "share_pct": round(group["count"] / script["sampled"] * 100, 2),
+                "latency": latency.to_stats(),
+                "server": server.to_stats(),
+                "statements": [
+                    {**s, "text": statement_texts[s["statement"]] if s["statement"] < len(statement_texts) else None}
+                    for s in group["statements"]
+                ],
+            }
+            if include_histograms:
+                item["histogram"] = latency.encode()
+            groups.append(item)
+        return {
+            "sampled": script["sampled"],
+            "distinct_plans": len(groups),
+            "other": script["other"],
+            "plans": groups,
+        }
@@ -0,0 +1,112 @@
+"""
+Чтение журналов PostgreSQL в формате csvlog для воспроизведения нагрузки.
+
+Файл отображается в память (mmap) и читается построчно — целиком в память не грузится.
+Воспроизводятся записи, в которых есть текст запроса и (желательно) его длительность:
+
+    duration: 1.234 ms  statement: SELECT ...
+    duration: 0.456 ms  execute <unnamed>: SELECT ... WHERE id = $1     (+ detail "parameters: $1 = '42'")
+    statement: SELECT ...                                                (log_statement=all, без длительности)
+
+Нужны log_destination=csvlog и log_min_duration_statement=0 (или log_statement=all).
+Выгрузки pg_stat_statements для воспроизведения не подходят: в них нет моментов выполнения,
+только суммарные счётчики — для такой нагрузки есть /load.
+"""
+import re
+import csv
+import mmap
+import datetime
+from pathlib import Path
+from typing import Iterator
+
+# Колонки csvlog (PG 13+; у старших версий в конце добавлены новые — они не мешают)
+COL_LOG_TIME = 0
+COL_USER = 1
+COL_DATABASE = 2
+COL_SESSION_ID = 5
+COL_SEVERITY = 11
+COL_MESSAGE = 13
+COL_DETAIL = 14
+
+_MESSAGE_RE = re.compile(
+    r"^(?:duration: (?P<ms>\d+(?:\.\d+)?) ms\s+)?(?:statement|execute [^:]*): (?P<sql>.*)$",
+    re.DOTALL,
+)
+_PARAM_RE = re.compile(r"\$(\d+) = (?:NULL|'((?:[^']|'')*)')")
+_DOLLAR_PARAM_RE = re.compile(r"\$(\d+)(?!\d)")
+
+# текст запроса в журнале бывает длиннее стандартного лимита поля csv (128 КБ)
+csv.field_size_limit(2**31 - 1)
+
+
+class LogEvent:
+    __slots__ = ("offset_s", "session", "sql", "params", "duration_ms")
+
+    def __init__(self, offset_s: float, session: str, sql: str, params: dict | None, duration_ms: float | None):
+        self.offset_s = offset_s
+        self.session = session
+        self.sql = sql
+        self.params = params
+        self.duration_ms = duration_ms
+
+
+def _parse_time(value: str) -> datetime.datetime:
+    # "2024-05-01 12:00:00.123 MSK" — зона одна на весь файл, для относительных моментов не нужна
+    return datetime.datetime.fromisoformat(value[:23].rstrip())
+
+
+def _parse_params(detail: str) -> dict | None:
+    if not detail.startswith("parameters: "):
+        return None
+    params = {}
+    for m in _PARAM_RE.finditer(detail):
+        value = m.group(2)
+        params[f"p{m.group(1)}"] = None if value is None else value.replace("''", "'")
+    return params
+
+
+def to_bind_query(sql: str) -> str:
+    """
+    Запрос с $1, $2 ... -> psycopg-запрос с %(p1)s, %(p2)s; прочие «%» экранируются.
+    """
+    return _DOLLAR_PARAM_RE.sub(lambda m: f"%(p{m.group(1)})s", sql.replace("%", "%%"))
+
+
+def iter_events(path: Path, database: str | None = None, user: str | None = None) -> Iterator[LogEvent]:
+    """
+    Поток воспроизводимых записей журнала в порядке файла. offset_s — момент начала запроса
+    (время записи минус длительность) относительно первой записи.
+    """
+    with path.open("rb") as f:
+        if path.stat().st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = (line.decode("utf-8", errors="replace") for line in iter(mm.readline, b""))
+            base: datetime.datetime | None = None
+            for row in csv.reader(lines):
+                if len(row) <= COL_DETAIL or row[COL_SEVERITY] != "LOG":
+                    continue
+                if database is not None and row[COL_DATABASE] != database:
+                    continue
+                if user is not None and row[COL_USER] != user:
+                    continue
+                m = _MESSAGE_RE.match(row[COL_MESSAGE])
+                if not m:
+                    continue
+                try:
+                    logged_at = _parse_time(row[COL_LOG_TIME])
+                except ValueError:
+                    continue
+                duration_ms = float(m.group("ms")) if m.group("ms") else None
+                started_at = logged_at - datetime.timedelta(milliseconds=duration_ms or 0)
+                if base is None:
+                    base = started_at
+                params = _parse_params(row[COL_DETAIL])
+                sql = m.group("sql").strip()
+                yield LogEvent(
+                    (started_at - base).total_seconds(),
+                    row[COL_SESSION_ID],
+                    to_bind_query(sql) if params is not None else sql,
+                    params,
+                    duration_ms,
+                )
@@ -0,0 +1,169 @@
+"""
+Сценарии нагрузки: смесь сессионных потоков с весами, паузы «на раздумье», бюджет
+по времени или по числу итераций.
+
+Файл <name>.json в SCENARIOS_DIR:
+
+    {
+      "sessions": 32,
+      "duration": "5m",                 # или "iterations": 10000
+      "think_time": {"dist": "exponential", "mean_ms": 200},
+      "flows": [
+        {"script": 1, "weight": 80},    # поток из одного шага
+        {"name": "checkout", "weight": 5, "transactional": true,
+         "steps": [{"script": 3}, {"script": 4, "think_time": {"dist": "constant", "ms": 0}}]}
+      ]
+    }
+
+Сессия — виртуальный пользователь: выбирает поток по весу, держит одно соединение
+на весь поток и выполняет шаги по порядку с паузами после каждого шага.
+"""
+import re
+import json
+import random
+from pathlib import Path
+from typing import Callable
+
+NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+THINK_DISTRIBUTIONS = ("constant", "uniform", "exponential", "normal")
+
+
+def think_time_sampler(spec: dict | None) -> Callable[[random.Random], float]:
+    """
+    Функция rng -> пауза в секундах по описанию распределения (значения в мс).
+    """
+    if not spec:
+        return lambda rng: 0.0
+    if not isinstance(spec, dict):
+        raise ValueError("think_time must be an object")
+    dist = spec.get("dist", "constant")
+    try:
+        if dist == "constant":
+            value = float(spec.get("ms", 0)) / 1000
+            return lambda rng: value
+        if dist == "uniform":
+            low, high = float(spec["min_ms"]) / 1000, float(spec["max_ms"]) / 1000
+            if low > high:
+                raise ValueError("think_time: min_ms > max_ms")
+            return lambda rng: rng.uniform(low, high)
+        if dist == "exponential":
+            mean = float(spec["mean_ms"]) / 1000
+            if mean <= 0:
+                return lambda rng: 0.0
+            return lambda rng: rng.expovariate(1 / mean)
+        if dist == "normal":
+            mean, stddev = float(spec["mean_ms"]) / 1000, float(spec.get("stddev_ms", 0)) / 1000
+            return lambda rng: max(0.0, rng.gauss(mean, stddev))
+    except KeyError as e:
+        raise ValueError(f"think_time '{dist}': missing {e.args[0]}")
+    raise ValueError(f"think_time: unknown dist '{dist}' (expected one of {', '.join(THINK_DISTRIBUTIONS)})")
+
+
+class Step:
+    __slots__ = ("script", "think")
+
+    def __init__(self, script: int, think: Callable[[random.Random], float]):
+        self.script = script
+        self.think = think
+
+
+class Flow:
+    __slots__ = ("name", "weight", "transactional", "steps")
+
+    def __init__(self, name: str, weight: float, transactional: bool, steps: list[Step]):
+        self.name = name
+        self.weight = weight
+        self.transactional = transactional
+        self.steps = steps
+
+
+class Scenario:
+    """
+    Разобранный и проверенный сценарий. Бюджет — duration_s или iterations (потоков суммарно).
+    """
+
+    __slots__ = ("name", "sessions", "duration_s", "iterations", "flows", "_cum_weights")
+
+    def __init__(self, name: str, sessions: int, duration_s: float | None, iterations: int | None, flows: list[Flow]):
+        self.name = name
+        self.sessions = sessions
+        self.duration_s = duration_s
+        self.iterations = iterations
+        self.flows = flows
+        acc = 0.0
+        self._cum_weights = []
+        for flow in flows:
+            acc += flow.weight
+            self._cum_weights.append(acc)
+
+    def pick(self, rng: random.Random) -> Flow:
+        return rng.choices(self.flows, cum_weights=self._cum_weights)[0]
+
+    def scripts(self) -> list[int]:
+        return sorted({step.script for flow in self.flows for step in flow.steps})
+
+
+def parse_scenario(name: str, data: dict, parse_duration: Callable[[str], float]) -> Scenario:
+    """
+    Проверить описание сценария. Ошибки — ValueError с понятным текстом.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Scenario must be a JSON object")
+    sessions = data.get("sessions", 1)
+    if not isinstance(sessions, int) or sessions < 1:
+        raise ValueError("'sessions' must be a positive integer")
+
+    duration_s = parse_duration(str(data["duration"])) if data.get("duration") is not None else None
+    iterations = data.get("iterations")
+    if iterations is not None and (not isinstance(iterations, int) or iterations < 1):
+        raise ValueError("'iterations' must be a positive integer")
+    if duration_s is None and iterations is None:
+        raise ValueError("Scenario needs 'duration' or 'iterations'")
+
+    default_think = think_time_sampler(data.get("think_time"))
+    raw_flows = data.get("flows")
+    if not isinstance(raw_flows, list) or not raw_flows:
+        raise ValueError("'flows' must be a non-empty list")
+
+    flows = []
+    for i, raw in enumerate(raw_flows):
+        if not isinstance(raw, dict):
+            raise ValueError(f"flows[{i}] must be an object")
+        weight = raw.get("weight", 1)
+        if not isinstance(weight, (int, float)) or weight <= 0:
+            raise ValueError(f"flows[{i}]: 'weight' must be > 0")
+        flow_think = think_time_sampler(raw["think_time"]) if "think_time" in raw else default_think
+        raw_steps = raw.get("steps")
+        if raw_steps is None and "script" in raw:
+            raw_steps = [{"script": raw["script"]}]
+        if not isinstance(raw_steps, list) or not raw_steps:
+            raise ValueError(f"flows[{i}] needs 'script' or a non-empty 'steps' list")
+        steps = []
+        for j, step in enumerate(raw_steps):
+            script = step.get("script") if isinstance(step, dict) else step
+            if isinstance(script, str):
+                m = re.match(r"^(\d+)(?:\.sql)?$", script)
+                script = int(m.group(1)) if m else None
+            if not isinstance(script, int) or script < 1:
+                raise ValueError(f"flows[{i}].steps[{j}]: 'script' must be a script number like 3 or '3.sql'")
+            think = think_time_sampler(step["think_time"]) if isinstance(step, dict) and "think_time" in step else flow_think
+            steps.append(Step(script, think))
+        flow_name = raw.get("name") or (f"{steps[0].script}.sql" if len(steps) == 1 else f"flow{i + 1}")
+        flows.append(Flow(str(flow_name), float(weight), bool(raw.get("transactional", False)), steps))
+
+    names = [f.name for f in flows]
+    if len(set(names)) != len(names):
+        raise ValueError("Flow names must be unique")
+    return Scenario(name, sessions, duration_s, iterations, flows)
+
+
+def scenario_path(scenarios_dir: Path, name: str) -> Path:
+    if not NAME_RE.match(name):
+        raise ValueError("Invalid scenario name")
+    return scenarios_dir / f"{name}.json"
+
+
+def load_scenario_file(path: Path) -> dict:
+    with path.open(encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,116 @@
+"""
+Разбор текста SQL-скриптов: разбиение на операторы и нормализация для сопоставления
+с pg_stat_statements.
+"""
+import re
+from functools import lru_cache
+
+_DOLLAR_TAG_RE = re.compile(r"\$([A-Za-z_][A-Za-z_0-9]*)?\$")
+
+_COMMENT_LINE_RE = re.compile(r"--[^\n]*")
+_COMMENT_BLOCK_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_STRING_RE = re.compile(r"(?:[EeBbXxNn])?'(?:[^']|'')*'")
+_DOLLAR_STRING_RE = re.compile(r"\$([A-Za-z_][A-Za-z_0-9]*)?\$.*?\$\1\$", re.DOTALL)
+_PARAM_RE = re.compile(r"\$\d+|%\(\w+\)s|%s")
+_NUMBER_RE = re.compile(r"(?<![\w.])[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_WS_RE = re.compile(r"\s+")
+_ROW_QUERY_RE = re.compile(r"^\(*\s*(select|values|table|with)\b")
+_DML_RE = re.compile(r"\b(insert|update|delete|merge)\b")
+_EXPLAINABLE_RE = re.compile(r"^\(*\s*(select|values|table|with|insert|update|delete|merge|execute)\b")
+
+
+def split_statements(sql: str) -> list[str]:
+    """
+    Разбить скрипт на отдельные операторы по «;» верхнего уровня.
+    Учитываются строки '...', идентификаторы "...", $tag$-строки и комментарии.
+    Пустые операторы (только пробелы/комментарии) отбрасываются.
+    """
+    statements: list[str] = []
+    buf_start = 0
+    i = 0
+    n = len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch == "-" and sql.startswith("--", i):
+            j = sql.find("\n", i)
+            i = n if j < 0 else j + 1
+            continue
+        if ch == "/" and sql.startswith("/*", i):
+            # блочные комментарии в PostgreSQL могут быть вложенными
+            depth = 1
+            i += 2
+            while i < n and depth:
+                if sql.startswith("/*", i):
+                    depth += 1
+                    i += 2
+                elif sql.startswith("*/", i):
+                    depth -= 1
+                    i += 2
+                else:
+                    i += 1
+            continue
+        if ch == "'" or ch == '"':
+            j = i + 1
+            while j < n:
+                if sql[j] == ch:
+                    if j + 1 < n and sql[j + 1] == ch:
+                        j += 2
+                        continue
+                    break
+                j += 1
+            i = j + 1
+            continue
+        if ch == "$":
+            m = _DOLLAR_TAG_RE.match(sql, i)
+            if m and not (i > 0 and (sql[i - 1].isalnum() or sql[i - 1] == "_")):
+                tag = m.group(0)
+                j = sql.find(tag, m.end())
+                i = n if j < 0 else j + len(tag)
+                continue
+        if ch == ";":
+            stmt = sql[buf_start:i].strip()
+            if stmt and normalize_statement(stmt):
+                statements.append(stmt)
+            buf_start = i + 1
+        i += 1
+    tail = sql[buf_start:].strip()
+    if tail and normalize_statement(tail):
+        statements.append(tail)
+    return statements
+
+
+def normalize_statement(sql: str) -> str:
+    """
+    Привести оператор к виду, сравнимому с текстом pg_stat_statements: без комментариев,
+    литералы и параметры ($n, %(name)s, %s) заменены на «?», пробелы схлопнуты, регистр понижен.
+    """
+    text = _COMMENT_BLOCK_RE.sub(" ", sql)
+    text = _COMMENT_LINE_RE.sub(" ", text)
+    text = _DOLLAR_STRING_RE.sub("?", text)
+    text = _STRING_RE.sub("?", text)
+    text = _PARAM_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _WS_RE.sub(" ", text).strip().rstrip(";").strip()
+    return text.lower()
+
+
+@lru_cache(maxsize=4096)
+def is_row_query(sql: str) -> bool:
+    """
+    Можно ли открыть по оператору серверный курсор (DECLARE ... CURSOR FOR):
+    SELECT/VALUES/TABLE и WITH без модифицирующих подзапросов.
+    """
+    text = normalize_statement(sql)
+    m = _ROW_QUERY_RE.match(text)
+    if not m:
+        return False
+    return m.group(1) != "with" or not _DML_RE.search(text)
+
+
+@lru_cache(maxsize=4096)
+def is_explainable(sql: str) -> bool:
+    """
+    Можно ли выполнить оператор под EXPLAIN ANALYZE: запросы и DML (включая WITH и EXECUTE).
+    DDL, SET, управление транзакциями и прочие служебные команды — нет.
+    """
+    return bool(_EXPLAINABLE_RE.match(normalize_statement(sql)))
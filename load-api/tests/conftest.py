@@ -0,0 +1,26 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# модули сервиса импортируются как верхнеуровневые (как в main.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(scope="session")
+def main_module(tmp_path_factory):
+    """
+    main.py без базы: DSN смотрит в пустой каталог, история и скрипты — во временном.
+    Пулы, которые трогают тесты, подменяются фейками.
+    """
+    d = tmp_path_factory.mktemp("main")
+    os.environ.update({
+        "DB_DSN": f"postgresql://test@/test?host={d}&connect_timeout=1",
+        "HISTORY_DB": str(d / "history.sqlite3"),
+        "SCRIPTS_DIR": str(d / "sql"),
+    })
+    import main
+
+    main.pool.close()
+    return main
@@ -0,0 +1,53 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from abtest import check_target, interleaved_jobs, new_samples, paired_speedup, parse_targets
+
+
+def test_parse_targets():
+    assert parse_targets("  ") == {}
+    assert parse_targets('{"replica": "postgresql://r/db"}') == {"replica": "postgresql://r/db"}
+    with pytest.raises(ValueError, match="JSON object"):
+        parse_targets('["x"]')
+    with pytest.raises(ValueError, match="cannot be redefined"):
+        parse_targets('{"default": "postgresql://x/db"}')
+    with pytest.raises(ValueError, match="non-empty string"):
+        parse_targets('{"a": ""}')
+
+
+def test_check_target_name():
+    check_target("new_index.v2", "postgresql://x/db")
+    with pytest.raises(ValueError, match="Invalid target name"):
+        check_target("bad name", "postgresql://x/db")
+
+
+def test_interleaved_jobs_cover_every_round():
+    jobs = list(interleaved_jobs([1, 2, 3], ["a", "b"], 4, random.Random(0)))
+    assert len(jobs) == 3 * 2 * 4
+    assert Counter((n, name) for _, n, name in jobs) == {(n, t): 4 for n in (1, 2, 3) for t in ("a", "b")}
+    rounds = [r for r, _, _ in jobs]
+    assert rounds == sorted(rounds)
+
+
+def test_paired_speedup():
+    baseline = new_samples(20)
+    other = new_samples(20)
+    assert math.isnan(baseline[0])
+    rng = random.Random(1)
+    for r in range(20):
+        baseline[r] = 10.0 * rng.uniform(0.95, 1.05)
+        other[r] = 5.0 * rng.uniform(0.95, 1.05)
+    other[7] = math.nan  # упавший запуск выбивает раунд из пар
+    result = paired_speedup(baseline, other)
+    assert result["pairs"] == 19
+    assert result["verdict"] == "faster"
+    assert result["ci95"][0] < result["speedup"] < result["ci95"][1]
+    assert 1.8 < result["speedup"] < 2.2
+    assert paired_speedup(other, baseline)["verdict"] == "slower"
+
+
+def test_paired_speedup_needs_two_pairs():
+    assert paired_speedup(new_samples(3), new_samples(3))["verdict"] == "insufficient data"
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from catalog import ScriptCatalog
+
+
+@pytest.fixture
+def scripts_dir(tmp_path):
+    for n, text in ((1, "SELECT 1"), (3, "SELECT 3"), (7, "SELECT 7")):
+        (tmp_path / f"{n}.sql").write_text(text, encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("-", encoding="utf-8")
+    return tmp_path
+
+
+def _contents(catalog):
+    return [entry.content for entry in catalog.entries()]
+
+
+def test_load_renumbers_without_gaps(scripts_dir):
+    catalog = ScriptCatalog(scripts_dir)
+    assert catalog.numbers() == [1, 2, 3]
+    assert _contents(catalog) == ["SELECT 1", "SELECT 3", "SELECT 7"]
+    assert sorted(p.name for p in scripts_dir.glob("*.sql")) == ["1.sql", "2.sql", "3.sql"]
+
+
+def test_write_add_delete(scripts_dir):
+    catalog = ScriptCatalog(scripts_dir)
+
+    entry = catalog.write(2, "SELECT 'two'")
+    assert entry.content == "SELECT 'two'" and (scripts_dir / "2.sql").read_text() == "SELECT 'two'"
+    assert catalog.add(b"SELECT 4").n == 4
+    catalog.delete(1)
+    assert _contents(catalog) == ["SELECT 'two'", "SELECT 7", "SELECT 4"]
+    with pytest.raises(KeyError):
+        catalog.write(9, "x")
+
+
+def test_add_many_rolls_back_on_error(scripts_dir):
+    catalog = ScriptCatalog(scripts_dir)
+    with pytest.raises(ValueError, match="bad.sql: not a UTF-8"):
+        catalog.add_many([("ok.sql", b"SELECT 1"), ("bad.sql", b"\xff\xfe")])
+    assert len(catalog) == 3
+    assert not (scripts_dir / "4.sql").exists()
+
+
+def test_cached_survives_move(scripts_dir):
+    catalog = ScriptCatalog(scripts_dir)
+    calls = []
+    catalog.get(3).cached("parsed", lambda sql: calls.append(sql) or sql.lower())
+    catalog.delete(1)
+    assert catalog.get(2).cached("parsed", lambda sql: calls.append(sql)) == "select 7"
+    assert calls == ["SELECT 7"]
+
+
+def test_sync_picks_up_external_changes(scripts_dir):
+    catalog = ScriptCatalog(scripts_dir)
+    assert catalog.sync() is None  # первая сверка загружает каталог
+    assert catalog.sync() == []
+    path = scripts_dir / "2.sql"
+    path.write_text("SELECT 'changed'", encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert catalog.sync() == [2]
+    assert catalog.get(2).content == "SELECT 'changed'"
+    (scripts_dir / "9.sql").write_text("SELECT 9", encoding="utf-8")
+    assert catalog.sync() is None
+    assert catalog.numbers() == [1, 2, 3, 4]
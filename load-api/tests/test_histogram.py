@@ -0,0 +1,100 @@
+import math
+import random
+import zlib
+from array import array
+
+import pytest
+
+from histogram import _HEADER, LatencyHistogram, MAX_SIGNIFICANT_DIGITS, mann_whitney
+
+
+def _filled(values_us, digits=3):
+    hist = LatencyHistogram(digits)
+    for v in values_us:
+        hist.record_us(v)
+    return hist
+
+
+def test_percentiles_within_precision():
+    rng = random.Random(1)
+    values = sorted(rng.randint(1, 5_000_000) for _ in range(20000))
+    hist = _filled(values)
+    for pct, got in hist.percentiles_us([50.0, 90.0, 99.0, 99.9]).items():
+        exact = values[math.ceil(pct / 100 * len(values)) - 1]
+        assert abs(got - exact) <= exact * 1e-3 + 1
+    assert hist.min_us == values[0]
+    assert hist.max_us == values[-1]
+    assert hist.mean_us() == pytest.approx(sum(values) / len(values))
+
+
+def test_empty_stats_and_clamping():
+    hist = LatencyHistogram(2, highest_us=1000)
+    assert hist.to_stats()["max_ms"] == 0.0
+    hist.record_us(-5)
+    hist.record_us(10 ** 9)
+    assert (hist.min_us, hist.max_us, hist.total) == (0, 1000, 2)
+
+
+def test_precision_is_capped():
+    LatencyHistogram(MAX_SIGNIFICANT_DIGITS)
+    with pytest.raises(ValueError):
+        LatencyHistogram(MAX_SIGNIFICANT_DIGITS + 1)
+
+
+def test_counts_are_sparse():
+    hist = _filled([100, 100, 5_000_000], digits=4)
+    assert len(hist._counts) == 2
+
+
+def test_merge_matches_single_histogram():
+    rng = random.Random(2)
+    a_vals = [rng.randint(1, 100_000) for _ in range(5000)]
+    b_vals = [rng.randint(50_000, 900_000) for _ in range(5000)]
+    merged = _filled(a_vals).merge(_filled(b_vals))
+    single = _filled(a_vals + b_vals)
+    assert merged.to_stats() == single.to_stats()
+    assert merged.total == 10000
+
+
+def test_merge_across_precisions():
+    merged = _filled([1000, 2000], digits=2).merge(_filled([3000], digits=4))
+    assert merged.total == 3
+    assert merged.max_us == 3000
+
+
+def test_roundtrip_encode():
+    hist = _filled([1, 17, 17, 250_000, 3_000_000])
+    back = LatencyHistogram.decode(hist.encode())
+    assert back.to_stats() == hist.to_stats()
+    assert back._counts == hist._counts
+    assert back.sum_us == hist.sum_us
+
+
+def test_decodes_legacy_dense_format():
+    hist = _filled([5, 5, 1234, 98_765])
+    dense = array("q", [0]) * hist._dense_size()
+    for idx, count in hist._counts.items():
+        dense[idx] = count
+    data = _HEADER.pack(
+        hist.significant_digits, hist.highest_us, hist.total, hist.min_us, hist.max_us, hist.sum_us
+    ) + zlib.compress(dense.tobytes())
+    back = LatencyHistogram.from_bytes(data)
+    assert back._counts == hist._counts
+    assert back.to_stats() == hist.to_stats()
+
+
+def test_rejects_garbage():
+    with pytest.raises(ValueError):
+        LatencyHistogram.from_bytes(_HEADER.pack(9, 1000, 0, 0, 0, 0.0) + zlib.compress(b""))
+
+
+def test_mann_whitney():
+    rng = random.Random(3)
+    fast = _filled(rng.randint(1000, 2000) for _ in range(500))
+    slow = _filled(rng.randint(1500, 2500) for _ in range(500))
+    same = _filled(rng.randint(1000, 2000) for _ in range(500))
+    result = mann_whitney(fast, slow)
+    assert result["p_value"] < 0.001
+    assert result["prob_b_slower"] > 0.5
+    assert mann_whitney(fast, same)["p_value"] > 0.001
+    assert mann_whitney(LatencyHistogram(), fast)["p_value"] == 1.0
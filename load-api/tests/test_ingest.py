@@ -0,0 +1,68 @@
+import io
+import json
+import tarfile
+import zipfile
+
+import pytest
+
+from ingest import detect_format, iter_bundle
+
+FILES = {"10.sql": b"SELECT 10", "2.sql": b"SELECT 2", "dir/1.sql": b"SELECT 1", "readme.txt": b"-", "._3.sql": b"x"}
+NATURAL = ["2.sql", "10.sql", "dir/1.sql"]
+
+
+def _tar(mode: str) -> io.BytesIO:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode=mode) as tar:
+        for name, data in FILES.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    buf.seek(0)
+    return buf
+
+
+def _zip() -> io.BytesIO:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in FILES.items():
+            zf.writestr(name, data)
+        zf.writestr("__MACOSX/4.sql", b"x")
+    buf.seek(0)
+    return buf
+
+
+@pytest.mark.parametrize("mode", ["w", "w:gz", "w:xz"])
+def test_tar_in_natural_order(mode):
+    f = _tar(mode)
+    assert detect_format(f) == "tar"
+    items = list(iter_bundle(f, "auto"))
+    assert [name for name, _ in items] == NATURAL
+    assert dict(items)["10.sql"] == b"SELECT 10"
+
+
+def test_zip_in_natural_order():
+    f = _zip()
+    assert detect_format(f) == "zip"
+    assert [name for name, _ in iter_bundle(f, "auto")] == NATURAL
+
+
+def test_ndjson():
+    lines = [json.dumps({"name": "a", "content": "SELECT 1"}), "", json.dumps("SELECT 2")]
+    f = io.BytesIO("\n".join(lines).encode("utf-8"))
+    assert detect_format(f) == "ndjson"
+    assert list(iter_bundle(f, "auto")) == [("a", b"SELECT 1"), ("line 3", b"SELECT 2")]
+
+
+def test_ndjson_errors():
+    with pytest.raises(ValueError, match="line 1: invalid JSON"):
+        list(iter_bundle(io.BytesIO(b"{nope"), "ndjson"))
+    with pytest.raises(ValueError, match="line 1: expected a string"):
+        list(iter_bundle(io.BytesIO(b'{"content": 1}'), "ndjson"))
+
+
+def test_format_errors():
+    with pytest.raises(ValueError, match="Invalid zip"):
+        list(iter_bundle(io.BytesIO(b"not a zip"), "zip"))
+    with pytest.raises(ValueError, match="Unknown format"):
+        list(iter_bundle(io.BytesIO(b""), "rar"))
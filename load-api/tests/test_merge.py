@@ -0,0 +1,84 @@
+from histogram import LatencyHistogram
+
+
+def _hist(*values_ms: float) -> str:
+    h = LatencyHistogram(3)
+    for v in values_ms:
+        h.record_ms(v)
+    return h.encode()
+
+
+def _load_report(latency: tuple, scheduled: int, errors: int, peak: int, schedule_ms: float) -> dict:
+    return {
+        "by_script": {
+            1: {
+                "script": "1.sql",
+                "scheduled": scheduled,
+                "completed": len(latency),
+                "errors": errors,
+                "dropped": 0,
+                "late": 1,
+                "histograms": {"latency": _hist(*latency), "service": _hist(*(v / 2 for v in latency))},
+            }
+        },
+        "summary": {
+            "scheduled": scheduled,
+            "completed": len(latency),
+            "errors": errors,
+            "dropped": 0,
+            "late": 1,
+            "max_in_flight_seen": peak,
+            "schedule_time_ms": schedule_ms,
+        },
+    }
+
+
+def test_merge_load_reports(main_module):
+    reports = [_load_report((1.0, 2.0), 3, 1, 5, 10.0), _load_report((8.0,), 2, 0, 3, 12.5)]
+    by_script, summary = main_module._merge_load_reports(reports, include_histograms=True, hist_precision=3)
+    data = by_script[1]
+    assert (data["scheduled"], data["completed"], data["errors"], data["late"]) == (5, 3, 1, 2)
+    assert data["latency"]["max_ms"] == 8.0 and data["service"]["max_ms"] == 4.0
+    assert LatencyHistogram.decode(data["histograms"]["latency"]).total == 3
+    assert summary["completed"] == 3 and summary["errors"] == 1
+    # пики процессов приходятся на разные моменты — не складываются
+    assert summary["max_in_flight_seen"] == 5 and summary["max_in_flight_seen_by_process"] == [5, 3]
+    assert summary["schedule_time_ms"] == 12.5
+
+    by_script, _ = main_module._merge_load_reports(reports, include_histograms=False, hist_precision=3)
+    assert "histograms" not in by_script[1]
+
+
+def _many_report(main_module, values: tuple, errors: int, rows: int, ttfr: tuple) -> dict:
+    return {
+        "by_script": {
+            1: {
+                "script": "1.sql",
+                "errors": errors,
+                "histogram": _hist(*values),
+                "phase_histograms": {ph: _hist(*values) for ph in main_module.PHASES},
+                "transfer": {"rows": rows, "bytes": rows * 10, "ttfr_histogram": _hist(*ttfr)},
+            }
+        },
+        "summary": {"total_tasks": len(values) + errors, "completed": len(values), "errors": errors},
+        "pool": {"connections_num": 2, "pool_size": 2},
+    }
+
+
+def test_merge_many_reports(main_module):
+    reports = [_many_report(main_module, (1.0, 3.0), 1, 4, ()), _many_report(main_module, (2.0,), 0, 2, ())]
+    by_script, summary, pool = main_module._merge_many_reports(reports, include_histograms=False, hist_precision=3)
+    data = by_script[1]
+    assert data["count"] == 3 and data["errors"] == 1
+    assert data["stats"]["max_ms"] == 3.0 and set(data["phases"]) == set(main_module.PHASES)
+    assert "histogram" not in data and "phase_histograms" not in data
+    # ttfr не измерялось (fetch=all/binary) — null, а не нули
+    assert data["transfer"]["rows"] == 6 and data["transfer"]["rows_per_run"] == 2.0
+    assert data["transfer"]["ttfr"] is None
+    assert summary == {"total_tasks": 4, "completed": 3, "errors": 1}
+    assert pool == {"connections_num": 4, "pool_size": 4}
+
+    reports = [_many_report(main_module, (1.0,), 0, 1, (0.5,)), _many_report(main_module, (1.0,), 0, 1, (0.7,))]
+    by_script, _, _ = main_module._merge_many_reports(reports, include_histograms=True, hist_precision=3)
+    assert by_script[1]["transfer"]["ttfr"]["max_ms"] == 0.7
+    assert LatencyHistogram.decode(by_script[1]["transfer"]["ttfr_histogram"]).total == 2
@@ -0,0 +1,82 @@
+import random
+from array import array
+
+import pytest
+
+from params import generate, parse_template
+
+SCRIPT = """\
+-- @param user_id range 1 100
+-- @param status  list new, paid ,shipped
+-- @param email   sample public.users email
+SELECT * FROM orders WHERE user_id = %(user_id)s AND status = %(status)s AND note LIKE 'x%';
+SELECT %(email)s, %(user_id)s;
+"""
+
+
+def _sample(table, column, limit):
+    assert (table, column) == ("public.users", "email")
+    return ["a@x", "b@x"]
+
+
+def _generate(template, size=50, tmp_path=None):
+    return generate(template, size, rng=random.Random(0), sample_column=_sample, base_dir=tmp_path)
+
+
+def test_plain_script_is_not_a_template():
+    assert parse_template("SELECT 1; SELECT '%(x)';") is None
+
+
+def test_placeholders_become_positional():
+    template = parse_template(SCRIPT)
+    (first, first_names), (second, second_names) = template.statements
+    assert first_names == ("user_id", "status")
+    assert "%s" in first and "%%" in first and "%(" not in first
+    assert second_names == ("email", "user_id")
+    assert set(template.specs) == {"user_id", "status", "email"}
+
+
+def test_template_errors():
+    with pytest.raises(ValueError, match="unknown generator"):
+        parse_template("-- @param x random 1 2\nSELECT %(x)s")
+    with pytest.raises(ValueError, match="No @param directive for: y"):
+        parse_template("-- @param x range 1 2\nSELECT %(x)s, %(y)s")
+
+
+def test_generate_columns(tmp_path):
+    pset = _generate(parse_template(SCRIPT), tmp_path=tmp_path)
+    user_ids = pset.columns["user_id"]
+    assert isinstance(user_ids, array) and len(user_ids) == 50
+    assert all(1 <= v <= 100 for v in user_ids)
+    assert set(pset.columns["status"]) <= {"new", "paid", "shipped"}
+    assert set(pset.columns["email"]) == {"a@x", "b@x"}
+    assert pset.describe()["sets"] == 50
+
+
+def test_next_statements_cycles_with_consistent_rows(tmp_path):
+    pset = _generate(parse_template(SCRIPT), size=3, tmp_path=tmp_path)
+    runs = [pset.next_statements() for _ in range(4)]
+    assert runs[3] == runs[0]
+    for (_, first_args), (_, second_args) in runs:
+        # один и тот же набор в обоих операторах запуска
+        assert first_args[0] == second_args[1]
+
+
+def test_csv_generator(tmp_path):
+    (tmp_path / "cities.csv").write_text("id,city\n1,Moscow\n2,\n3,Kazan\n", encoding="utf-8")
+    template = parse_template("-- @param c csv cities.csv city\nSELECT %(c)s")
+    pset = _generate(template, tmp_path=tmp_path)
+    assert set(pset.columns["c"]) == {"Moscow", "Kazan"}
+
+
+def test_csv_outside_base_dir_is_rejected(tmp_path):
+    template = parse_template("-- @param c csv ../secret.csv\nSELECT %(c)s")
+    with pytest.raises(ValueError, match="inside the scripts directory"):
+        _generate(template, tmp_path=tmp_path)
+
+
+def test_range_errors(tmp_path):
+    with pytest.raises(ValueError, match="LOW > HIGH"):
+        _generate(parse_template("-- @param x range 5 1\nSELECT %(x)s"), tmp_path=tmp_path)
+    floats = _generate(parse_template("-- @param x range 0.5 1.5\nSELECT %(x)s"), tmp_path=tmp_path)
+    assert floats.columns["x"].typecode == "d"
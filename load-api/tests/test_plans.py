@@ -0,0 +1,36 @@
+from plans import PlanCapture, plan_fingerprint
+
+
+def _explain(index: str | None, rows: int, ms: float) -> list:
+    node = {"Node Type": "Seq Scan", "Relation Name": "t", "Plan Rows": rows, "Actual Total Time": ms}
+    if index:
+        node = {"Node Type": "Index Scan", "Relation Name": "t", "Index Name": index, "Plan Rows": rows}
+    return [{"Plan": {"Node Type": "Limit", "Plans": [node]}, "Planning Time": 0.1, "Execution Time": ms}]
+
+
+def test_fingerprint_ignores_estimates_and_timing():
+    assert plan_fingerprint(_explain(None, 10, 1.0)) == plan_fingerprint(_explain(None, 99999, 50.0))
+    assert plan_fingerprint(_explain(None, 10, 1.0)) != plan_fingerprint(_explain("t_pkey", 10, 1.0))
+    assert plan_fingerprint(_explain("t_pkey", 1, 1.0)[0]) == plan_fingerprint(_explain("t_pkey", 1, 1.0))
+    assert plan_fingerprint(None) is None
+
+
+def test_capture_groups_runs_by_plan():
+    capture = PlanCapture(max_plans=2, hist_precision=3)
+    for _ in range(3):
+        capture.add(1, 5.0, [_explain(None, 10, 4.0), None])
+    capture.add(1, 1.0, [_explain("t_pkey", 10, 0.5), None])
+    capture.add(1, 1.0, [_explain("t_other", 10, 0.5), None])
+    assert capture.sampled() == 5
+
+    report = capture.report(1, ["SELECT ...", "SET x = 1"], include_histograms=True)
+    assert report["sampled"] == 5
+    assert report["distinct_plans"] == 2
+    assert report["other"] == 1
+    top = report["plans"][0]
+    assert top["count"] == 3 and top["share_pct"] == 60.0
+    assert top["server"]["median_ms"] == 4.1
+    assert [s["text"] for s in top["statements"]] == ["SELECT ...", "SET x = 1"]
+    assert top["statements"][1]["fingerprint"] is None
+    assert "histogram" in top
+    assert capture.report(2, [], include_histograms=False) is None
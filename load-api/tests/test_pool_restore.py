@@ -0,0 +1,115 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from psycopg_pool import AsyncConnectionPool
+
+
+class FakePool:
+    """
+    Пул без базы с теми полями psycopg_pool, которые трогают прогрев и _shrink_to_max.
+    resize() сразу «открывает» (новый min_size - прежний) коннектов, как psycopg_pool, если opens.
+    """
+
+    min_size = max_size = 0  # у AsyncConnectionPool это свойства без сеттера
+
+    def __init__(self, min_size: int, max_size: int, idle: int, busy: int = 0, opens: bool = True):
+        self.min_size, self.max_size = min_size, max_size
+        self._pool = [object() for _ in range(idle)]
+        self._nconns = idle + busy
+        self._nconns_min = idle
+        self._lock = threading.Lock()
+        self.opens = opens
+        self.opened = 0
+        self.shut = []
+
+    def _resize(self, min_size: int, max_size: int) -> None:
+        if self.opens:
+            for _ in range(max(0, min_size - self.min_size)):
+                self._pool.append(object())
+                self._nconns += 1
+                self.opened += 1
+        self.min_size, self.max_size = min_size, max_size
+
+    def resize(self, min_size: int, max_size: int) -> None:
+        self._resize(min_size, max_size)
+
+    def get_stats(self) -> dict:
+        return {"connections_num": self.opened, "pool_size": self._nconns, "pool_available": len(self._pool)}
+
+    def _close_connection(self, conn) -> None:
+        self.shut.append(conn)
+
+
+class FakeAsyncPool(FakePool, AsyncConnectionPool):
+    # isinstance(p, AsyncConnectionPool) выбирает асинхронную ветку; __init__ настоящего пула не вызывается
+
+    def __init__(self, *args, **kwargs):
+        FakePool.__init__(self, *args, **kwargs)
+        self._lock = asyncio.Lock()
+
+    async def resize(self, min_size: int, max_size: int) -> None:
+        self._resize(min_size, max_size)
+
+    async def _close_connection(self, conn) -> None:
+        self.shut.append(conn)
+
+
+@pytest.fixture
+def use_pool(main_module, monkeypatch):
+    def install(p):
+        if isinstance(p, AsyncConnectionPool):
+            async def get(target):
+                return p
+
+            monkeypatch.setattr(main_module, "_get_target_async_pool", get)
+            monkeypatch.setattr(main_module, "async_pool", p)
+        else:
+            monkeypatch.setattr(main_module, "_pool_for", lambda target: p)
+            monkeypatch.setattr(main_module, "pool", p)
+        return p
+
+    return install
+
+
+@pytest.mark.parametrize("cls", [FakePool, FakeAsyncPool])
+def test_shrink_closes_only_idle_excess(main_module, cls):
+    p = cls(2, 4, idle=5, busy=2)
+    asyncio.run(main_module._shrink_to_max(p))
+    assert len(p.shut) == 3 and len(p._pool) == 2 and p._nconns == 4
+    # занятые не трогаем: из простаивающих закрывается сколько есть
+    p = cls(2, 4, idle=1, busy=6)
+    asyncio.run(main_module._shrink_to_max(p))
+    assert len(p.shut) == 1 and p._pool == [] and p._nconns == 6 and p._nconns_min == 0
+
+
+def test_shrink_ignores_pool_without_private_fields(main_module):
+    asyncio.run(main_module._shrink_to_max(SimpleNamespace(max_size=1)))
+
+
+@pytest.mark.parametrize("engine, cls", [("thread", FakePool), ("async", FakeAsyncPool)])
+def test_prewarm_then_restore(main_module, use_pool, engine, cls):
+    p = use_pool(cls(1, 4, idle=1))
+    assert asyncio.run(main_module._prewarm_pool(engine, 8)) == (1, 4)
+    assert (p.min_size, p.max_size, p._nconns, p.opened) == (8, 8, 8, 7)
+    asyncio.run(main_module._restore_pool(engine, (1, 4)))
+    assert (p.min_size, p.max_size, p._nconns, len(p.shut)) == (1, 4, 4, 4)
+
+
+def test_prewarm_counts_leftover_connections(main_module, use_pool):
+    # 6 коннектов осталось от прошлого прогрева: открыть нужно только 2
+    p = use_pool(FakePool(1, 8, idle=6))
+    asyncio.run(main_module._prewarm_pool("thread", 8))
+    assert (p.min_size, p._nconns, p.opened) == (3, 8, 2)
+
+
+@pytest.mark.parametrize("engine, cls", [("thread", FakePool), ("async", FakeAsyncPool)])
+def test_prewarm_timeout_restores_sizes(main_module, use_pool, monkeypatch, engine, cls):
+    monkeypatch.setattr(main_module, "POOL_WARMUP_TIMEOUT_S", 0.05)
+    p = use_pool(cls(1, 4, idle=1, opens=False))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(main_module._prewarm_pool(engine, 8))
+    assert exc.value.status_code == 503 and "warm-up" in exc.value.detail
+    assert (p.min_size, p.max_size) == (1, 4)
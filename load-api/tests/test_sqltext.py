@@ -0,0 +1,45 @@
+from sqltext import is_explainable, is_row_query, normalize_statement, split_statements
+
+
+def test_split_respects_quotes_comments_and_dollar_strings():
+    sql = """
+        SELECT 'a;b', "c;d" FROM t; -- comment ; here
+        /* block ; /* nested ; */ still */
+        CREATE FUNCTION f() RETURNS int AS $body$ BEGIN RETURN 1; END $body$ LANGUAGE plpgsql;
+        SELECT $1;
+        ;
+        -- only a comment
+    """
+    statements = split_statements(sql)
+    assert len(statements) == 3
+    assert statements[0] == "SELECT 'a;b', \"c;d\" FROM t"
+    # комментарии остаются в тексте следующего оператора
+    assert "nested ; */ still */" in statements[1] and statements[1].endswith("LANGUAGE plpgsql")
+    assert statements[2] == "SELECT $1"
+
+
+def test_split_without_trailing_semicolon():
+    assert split_statements("SELECT 1; SELECT 2") == ["SELECT 1", "SELECT 2"]
+    assert split_statements("  \n-- nothing\n") == []
+
+
+def test_normalize_replaces_literals_and_params():
+    text = "SELECT *  FROM T WHERE a = 42 AND b = 'x''y' AND c = %(p)s AND d = $2 AND e = 1.5e3; -- tail"
+    assert normalize_statement(text) == "select * from t where a = ? and b = ? and c = ? and d = ? and e = ?"
+    assert normalize_statement("SELECT col1, t2.x FROM t2") == "select col1, t2.x from t2"
+
+
+def test_row_queries():
+    assert is_row_query("SELECT 1")
+    assert is_row_query("(VALUES (1))")
+    assert is_row_query("WITH x AS (SELECT 1) SELECT * FROM x")
+    assert not is_row_query("WITH x AS (DELETE FROM t RETURNING *) SELECT * FROM x")
+    assert not is_row_query("UPDATE t SET a = 1")
+
+
+def test_explainable():
+    assert is_explainable("UPDATE t SET a = 1")
+    assert is_explainable("EXECUTE stmt(1)")
+    assert not is_explainable("CREATE TABLE t (a int)")
+    assert not is_explainable("SET statement_timeout = 0")
+    assert not is_explainable("BEGIN")
@@ -0,0 +1,165 @@
+"""
+Фоновый сэмплер событий ожидания: пока идёт прогон, опрашивает pg_stat_activity
+(и pg_blocking_pids для ждущих блокировку) на отдельном соединении и строит профиль
+ожиданий по скриптам и по интервалам времени.
+"""
+import time
+import threading
+from typing import Callable
+
+import psycopg
+
+from histogram import LatencyHistogram
+
+_ACTIVITY_SQL = (
+    "SELECT pid, state, wait_event_type, wait_event, query "
+    "FROM pg_stat_activity WHERE application_name = %s AND pid <> pg_backend_pid()"
+)
+_BLOCKERS_SQL = "SELECT pid, pg_blocking_pids(pid) FROM unnest(%s::int[]) AS pid"
+
+
+def _event_key(state: str | None, wait_event_type: str | None, wait_event: str | None) -> str:
+    if wait_event_type:
+        return f"{wait_event_type}:{wait_event}"
+    # активный бэкенд без события ожидания — работает на CPU
+    return "CPU" if state == "active" else (state or "unknown")
+
+
+class WaitEventSampler:
+    """
+    Опрос раз в interval_ms. Бэкенды прогона отбираются по application_name пула,
+    принадлежность к скрипту определяет resolve_script(текст запроса) -> номер или None.
+    Держит одно своё соединение и не трогает пулы нагрузки.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        application_name: str,
+        resolve_script: Callable[[str], int | None],
+        interval_ms: int = 100,
+        bucket_ms: int = 1000,
+    ):
+        self.dsn = dsn
+        self.application_name = application_name
+        self.resolve_script = resolve_script
+        self.interval_s = interval_ms / 1000
+        self.bucket_ms = bucket_ms
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._error: str | None = None
+
+        self._polls = 0
+        self._poll_hist = LatencyHistogram()
+        self._by_script: dict[int, dict[str, int]] = {}
+        self._unattributed: dict[str, int] = {}
+        self._timeline: dict[int, dict[str, int]] = {}
+        self._timeline_samples: dict[int, int] = {}
+        self._blocked_samples = 0
+        self._blockers: dict[int, int] = {}
+        self._seen_pids: dict[int, int | None] = {}
+        self._started_ns = 0
+        self._stopped_ns = 0
+
+    def start(self) -> "WaitEventSampler":
+        self._started_ns = time.perf_counter_ns()
+        self._thread = threading.Thread(target=self._run, name="wait-event-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> dict:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._stopped_ns = time.perf_counter_ns()
+        return self.report()
+
+    def _run(self) -> None:
+        try:
+            with psycopg.connect(self.dsn, autocommit=True) as conn:
+                with conn.cursor() as cur:
+                    while not self._stop.is_set():
+                        t0 = time.perf_counter_ns()
+                        self._poll(cur, t0)
+                        poll_ns = time.perf_counter_ns() - t0
+                        self._poll_hist.record_us(poll_ns // 1000)
+                        self._stop.wait(max(0.0, self.interval_s - poll_ns / 1e9))
+        except Exception as e:
+            self._error = str(e).strip()
+
+    def _poll(self, cur, now_ns: int) -> None:
+        cur.execute(_ACTIVITY_SQL, (self.application_name,))
+        rows = cur.fetchall()
+        self._polls += 1
+        bucket = (now_ns - self._started_ns) // 1_000_000 // self.bucket_ms
+        timeline = self._timeline.setdefault(bucket, {})
+        self._timeline_samples[bucket] = self._timeline_samples.get(bucket, 0) + 1
+
+        lock_waiters = []
+        for pid, state, wait_event_type, wait_event, query in rows:
+            if state == "idle":
+                continue
+            key = _event_key(state, wait_event_type, wait_event)
+            n = self.resolve_script(query or "")
+            self._seen_pids[pid] = n
+            target = self._unattributed if n is None else self._by_script.setdefault(n, {})
+            target[key] = target.get(key, 0) + 1
+            timeline[key] = timeline.get(key, 0) + 1
+            if wait_event_type == "Lock":
+                lock_waiters.append(pid)
+
+        # pg_blocking_pids дорогой (берёт блокировки менеджера блокировок) — только для ждущих Lock
+        if lock_waiters:
+            cur.execute(_BLOCKERS_SQL, (lock_waiters,))
+            for _pid, blockers in cur.fetchall():
+                if blockers:
+                    self._blocked_samples += 1
+                    for b in blockers:
+                        self._blockers[b] = self._blockers.get(b, 0) + 1
+
+    def report(self) -> dict:
+        elapsed_ms = max(1e-9, (self._stopped_ns or time.perf_counter_ns()) - self._started_ns) / 1e6
+        poll_stats = self._poll_hist.to_stats()
+        busy_ms = self._poll_hist.sum_us / 1000
+        return {
+            "error": self._error,
+            "interval_ms": round(self.interval_s * 1000, 3),
+            "bucket_ms": self.bucket_ms,
+            "polls": self._polls,
+            "overhead": {
+                "avg_poll_ms": poll_stats["avg_ms"],
+                "p99_poll_ms": poll_stats["p99_ms"],
+                "max_poll_ms": poll_stats["max_ms"],
+                # доля времени прогона, которую сэмплер занимал своё соединение
+                "duty_cycle": round(busy_ms / elapsed_ms, 5),
+            },
+            "by_script": {
+                n: {"samples": sum(events.values()), "events": _sorted_events(events)}
+                for n, events in sorted(self._by_script.items())
+            },
+            "unattributed": _sorted_events(self._unattributed),
+            "timeline": [
+                {
+                    "t_s": round(bucket * self.bucket_ms / 1000, 3),
+                    "polls": self._timeline_samples[bucket],
+                    "events": _sorted_events(events),
+                }
+                for bucket, events in sorted(self._timeline.items())
+            ],
+            "blocked": {
+                "samples": self._blocked_samples,
+                "blockers": [
+                    {
+                        "pid": pid,
+                        "samples": count,
+                        "ours": pid in self._seen_pids,
+                        "script": self._seen_pids.get(pid),
+                    }
+                    for pid, count in sorted(self._blockers.items(), key=lambda kv: -kv[1])
+                ],
+            },
+        }
+
+
+def _sorted_events(events: dict[str, int]) -> dict[str, int]:
+    return dict(sorted(events.items(), key=lambda kv: -kv[1]))
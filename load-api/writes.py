@@ -0,0 +1,239 @@
+"""
+Нагрузка на запись: строки генерируются по описанию таблицы и вставляются пачками.
+
+    {
+      "table": "marketplace.orders",
+      "columns": {
+        "id":         "seq 1000000",              # возрастающие целые с START (уникальны в прогоне)
+        "user_id":    "range 1 100000",           # генераторы @param: range, list, sample, csv
+        "status":     "list new,paid,shipped",
+        "comment":    "text 40",                  # случайная строка длины LEN
+        "created_at": "now"                       # текущее время на момент генерации пачки
+      },
+      "methods": ["row", "executemany", "values", "copy"],
+      "batch_sizes": [1, 100, 1000],
+      "rows": 10000,
+      "transaction": "batch",                     # или autocommit
+      "truncate": false                           # TRUNCATE таблицы перед каждой парой method x batch_size
+    }
+
+Способы вставки:
+    row         — INSERT на каждую строку;
+    executemany — один INSERT, cursor.executemany по строкам пачки (psycopg шлёт их пайплайном);
+    values      — один INSERT ... VALUES (...), (...), ... на пачку;
+    copy        — COPY ... FROM STDIN на пачку.
+
+transaction=batch — пачка в одной транзакции, autocommit — каждый оператор фиксируется сам
+(для row/executemany это фиксация на каждой строке).
+"""
+import string
+import random
+import datetime
+import threading
+
+from psycopg import sql as pgsql
+
+from params import GENERATORS, ParamSpec, ScriptTemplate, generate
+
+WRITE_METHODS = ("row", "executemany", "values", "copy")
+WRITE_TRANSACTIONS = ("batch", "autocommit")
+# Генераторы, которые есть только у записи (значение зависит от номера строки или момента)
+WRITE_GENERATORS = ("seq", "text", "now")
+
+# Ограничение протокола: не больше 65535 параметров в одном операторе (для method=values)
+MAX_BIND_PARAMS = 65535
+
+_TEXT_ALPHABET = string.ascii_letters + string.digits
+
+
+class WriteSpec:
+    """
+    Проверенное описание записи: таблица, столбцы с генераторами и матрица method x batch_size.
+    """
+
+    __slots__ = ("table", "columns", "specs", "methods", "batch_sizes", "rows", "transaction", "truncate")
+
+    def __init__(
+        self, table: str, specs: dict[str, ParamSpec], methods: list[str], batch_sizes: list[int],
+        rows: int, transaction: str, truncate: bool,
+    ):
+        self.table = table
+        self.columns = list(specs)
+        self.specs = specs
+        self.methods = methods
+        self.batch_sizes = batch_sizes
+        self.rows = rows
+        self.transaction = transaction
+        self.truncate = truncate
+
+    def describe(self) -> dict:
+        return {name: spec.describe() for name, spec in self.specs.items()}
+
+
+def _as_list(data: dict, single: str, plural: str, default: list) -> list:
+    value = data.get(plural, data.get(single, default))
+    return value if isinstance(value, list) else [value]
+
+
+def parse_write_spec(data: dict) -> WriteSpec:
+    """
+    Проверить описание записи. Ошибки — ValueError с понятным текстом.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Write spec must be a JSON object")
+    table = data.get("table")
+    if not isinstance(table, str) or not table or table.count(".") > 1:
+        raise ValueError("'table' must be a name like 'orders' or 'schema.orders'")
+
+    raw_columns = data.get("columns")
+    if not isinstance(raw_columns, dict) or not raw_columns:
+        raise ValueError("'columns' must be a non-empty object: column -> generator")
+    specs: dict[str, ParamSpec] = {}
+    for name, raw in raw_columns.items():
+        if not isinstance(raw, str) or not raw.split():
+            raise ValueError(f"columns.{name}: expected a generator like 'range 1 100'")
+        kind, *args = raw.split()
+        kind = kind.lower()
+        if kind not in GENERATORS + WRITE_GENERATORS:
+            raise ValueError(
+                f"columns.{name}: unknown generator '{kind}' (expected one of {', '.join(GENERATORS + WRITE_GENERATORS)})"
+            )
+        if kind in ("seq", "text") and (len(args) > 1 or (args and not args[0].isdigit())):
+            raise ValueError(f"columns.{name}: {kind} takes one optional non-negative integer")
+        specs[name] = ParamSpec(name, kind, args)
+
+    methods = _as_list(data, "method", "methods", ["copy"])
+    for method in methods:
+        if method not in WRITE_METHODS:
+            raise ValueError(f"Unknown method '{method}' (expected one of {', '.join(WRITE_METHODS)})")
+    batch_sizes = _as_list(data, "batch_size", "batch_sizes", [1000])
+    for size in batch_sizes:
+        if not isinstance(size, int) or isinstance(size, bool) or not 1 <= size <= 1000000:
+            raise ValueError("'batch_size' values must be integers in 1..1000000")
+    if "values" in methods and max(batch_sizes) * len(specs) > MAX_BIND_PARAMS:
+        raise ValueError(f"method=values: batch_size x columns must not exceed {MAX_BIND_PARAMS} parameters")
+
+    rows = data.get("rows", 10000)
+    if not isinstance(rows, int) or isinstance(rows, bool) or rows < 1:
+        raise ValueError("'rows' must be a positive integer")
+    transaction = data.get("transaction", "batch")
+    if transaction not in WRITE_TRANSACTIONS:
+        raise ValueError(f"'transaction' must be one of: {', '.join(WRITE_TRANSACTIONS)}")
+    truncate = data.get("truncate", False)
+    if not isinstance(truncate, bool):
+        raise ValueError("'truncate' must be true or false")
+    return WriteSpec(
+        table, specs, list(dict.fromkeys(methods)), sorted(set(batch_sizes)), rows, transaction, truncate
+    )
+
+
+class RowSource:
+    """
+    Строки для вставки. Значения генераторов @param считаются заранее в пул из pool_size строк
+    и берутся по кругу; seq и now вычисляются по номеру строки и моменту сборки пачки.
+    Номера строк выдаются под блокировкой, пачки разных потоков не пересекаются.
+    """
+
+    def __init__(self, spec: WriteSpec, pool_size: int, *, rng: random.Random, sample_column, base_dir):
+        self.spec = spec
+        pooled = {name: s for name, s in spec.specs.items() if s.kind in GENERATORS}
+        self.pool_size = pool_size
+        self._pooled = generate(
+            ScriptTemplate([], pooled), pool_size, rng=rng, sample_column=sample_column, base_dir=base_dir
+        ).columns if pooled else {}
+        for name, s in spec.specs.items():
+            if s.kind == "text":
+                length = int(s.args[0]) if s.args else 16
+                self._pooled[name] = [
+                    "".join(rng.choices(_TEXT_ALPHABET, k=length)) for _ in range(pool_size)
+                ]
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def take(self, size: int) -> list[tuple]:
+        """
+        Следующие size строк в порядке столбцов спецификации.
+        """
+        with self._lock:
+            start = self._next
+            self._next += size
+        now = datetime.datetime.now(datetime.timezone.utc)
+        getters = []
+        for name in self.spec.columns:
+            s = self.spec.specs[name]
+            if s.kind == "seq":
+                base = int(s.args[0]) if s.args else 1
+                getters.append(lambda i, base=base: base + i)
+            elif s.kind == "now":
+                getters.append(lambda i, now=now: now)
+            else:
+                col = self._pooled[name]
+                getters.append(lambda i, col=col: col[i % self.pool_size])
+        return [tuple(get(i) for get in getters) for i in range(start, start + size)]
+
+
+def insert_sql(spec: WriteSpec) -> pgsql.Composed:
+    return pgsql.SQL("INSERT INTO {} ({}) VALUES ({})").format(
+        pgsql.Identifier(*spec.table.split(".")),
+        pgsql.SQL(", ").join(pgsql.Identifier(c) for c in spec.columns),
+        pgsql.SQL(", ").join(pgsql.Placeholder() * len(spec.columns)),
+    )
+
+
+def values_sql(spec: WriteSpec, rows: int) -> pgsql.Composed:
+    row = pgsql.SQL("({})").format(pgsql.SQL(", ").join(pgsql.Placeholder() * len(spec.columns)))
+    return pgsql.SQL("INSERT INTO {} ({}) VALUES {}").format(
+        pgsql.Identifier(*spec.table.split(".")),
+        pgsql.SQL(", ").join(pgsql.Identifier(c) for c in spec.columns),
+        pgsql.SQL(", ").join([row] * rows),
+    )
+
+
+def copy_sql(spec: WriteSpec) -> pgsql.Composed:
+    return pgsql.SQL("COPY {} ({}) FROM STDIN").format(
+        pgsql.Identifier(*spec.table.split(".")),
+        pgsql.SQL(", ").join(pgsql.Identifier(c) for c in spec.columns),
+    )
+
+
+def truncate_sql(spec: WriteSpec) -> pgsql.Composed:
+    return pgsql.SQL("TRUNCATE {}").format(pgsql.Identifier(*spec.table.split(".")))
+
+
+def payload_bytes(rows: list[tuple]) -> int:
+    """
+    Объём пачки в текстовом представлении COPY (значения, разделители, переводы строк) —
+    одна мера для всех способов вставки, считается вне замера.
+    """
+    return sum(sum(len(str(v)) for v in row) + len(row) for row in rows)
+
+
+class BatchWriter:
+    """
+    Вставка пачки выбранным способом на коннекте. Тексты операторов собираются один раз
+    (для values — на каждый встреченный размер пачки).
+    """
+
+    def __init__(self, spec: WriteSpec, method: str):
+        self.spec = spec
+        self.method = method
+        self._insert = insert_sql(spec)
+        self._copy = copy_sql(spec)
+        self._values: dict[int, pgsql.Composed] = {}
+
+    def write(self, conn, rows: list[tuple]) -> None:
+        with conn.cursor() as cur:
+            if self.method == "row":
+                for row in rows:
+                    cur.execute(self._insert, row)
+            elif self.method == "executemany":
+                cur.executemany(self._insert, rows)
+            elif self.method == "values":
+                query = self._values.get(len(rows))
+                if query is None:
+                    query = self._values[len(rows)] = values_sql(self.spec, len(rows))
+                cur.execute(query, [v for row in rows for v in row])
+            else:
+                with cur.copy(self._copy) as copy:
+                    for row in rows:
+                        copy.write_row(row)